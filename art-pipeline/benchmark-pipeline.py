@@ -0,0 +1,306 @@
+import argparse
+import contextlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from types import ModuleType
+from typing import Dict, List, Optional, Tuple, TypedDict
+
+import cv2
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak memory is left out there
+    resource = None
+
+# Runs the art pipeline stages end to end on generated test videos and writes the numbers to JSON, eg.
+#   python benchmark-pipeline.py --resolutions 1280x720 3840x2160 --gops 15 250
+#   python benchmark-pipeline.py --compare benchmark-results/20261017-120000.json
+# Every stage runs in a fresh process, so its peak memory is its own.
+
+SCRIPT_DIR: str = os.path.dirname(os.path.abspath(__file__))
+STAGES: List[str] = ["extract_frames", "extract_audio", "read_audio", "compress_video", "sanitize_filename"]
+FPS: int = 30
+SANITIZE_SAMPLES: List[str] = [
+    "Barren patch of dirt, walking slowly around the rock",
+    "  TREE_stump near the   river!! take two  ",
+    "",
+    "a" * 300,
+    "Überprüfung: moss-covered log, 3rd angle?",
+]
+SANITIZE_CALLS: int = 100000
+
+class TestVideo(TypedDict):
+    path: str
+    resolution: str
+    gop: Optional[int]
+    frame_count: int
+    # Measured from the file, since OpenCV's writer picks its own keyframe spacing
+    keyframe_interval: Optional[float]
+    has_audio: bool
+
+class StageResult(TypedDict):
+    stage: str
+    video: Optional[str]
+    resolution: Optional[str]
+    gop: Optional[int]
+    status: str
+    wall_seconds: float
+    frames: Optional[int]
+    frames_per_second: Optional[float]
+    calls_per_second: Optional[float]
+    megabytes_in: Optional[float]
+    megabytes_per_second: Optional[float]
+    peak_rss_mb: Optional[float]
+
+def load_script(filename: str) -> ModuleType:
+    """Import one of the hyphenated pipeline scripts as a module."""
+    path: str = os.path.join(SCRIPT_DIR, filename)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(filename)[0].replace("-", "_"), path)
+    module: ModuleType = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def parse_resolution(text: str) -> Tuple[int, int]:
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def pattern_frame(width: int, height: int, frame_number: int) -> np.ndarray:
+    """Colour bars scrolling under a moving circle and a frame counter, so every frame differs."""
+    x = (np.arange(width) * 8 // width + frame_number // 4) % 8
+    colours = np.array([[255, 255, 255], [0, 255, 255], [255, 255, 0], [0, 255, 0],
+                        [255, 0, 255], [0, 0, 255], [255, 0, 0], [0, 0, 0]], dtype=np.uint8)
+    frame: np.ndarray = np.ascontiguousarray(np.broadcast_to(colours[x], (height, width, 3)))
+    centre: Tuple[int, int] = (int(width * (0.5 + 0.4 * np.sin(frame_number / 15))), height // 2)
+    cv2.circle(frame, centre, max(4, height // 8), (128, 128, 128), -1)
+    cv2.putText(frame, str(frame_number), (20, height - 20), cv2.FONT_HERSHEY_SIMPLEX, height / 300, (255, 255, 255), 2)
+    return frame
+
+def generate_video(output_dir: str, width: int, height: int, gop: int, seconds: float) -> TestVideo:
+    """
+    Write a moving test pattern with a tone, using ffmpeg when it's installed.
+    Without ffmpeg OpenCV writes it instead, silent and with the codec's own keyframe spacing.
+    """
+    frame_count: int = int(seconds * FPS)
+    if shutil.which("ffmpeg"):
+        path: str = os.path.join(output_dir, f"testsrc-{width}x{height}-gop{gop}.mov")
+        cmd: List[str] = [
+            "ffmpeg", "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={FPS}:duration={seconds}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+            "-c:v", "libx264", "-g", str(gop), "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-shortest", "-y", path,
+        ]
+        subprocess.run(cmd, check=True)
+        has_audio: bool = True
+    else:
+        path = os.path.join(output_dir, f"pattern-{width}x{height}.mp4")
+        writer: cv2.VideoWriter = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), FPS, (width, height))
+        for frame_number in range(frame_count):
+            writer.write(pattern_frame(width, height, frame_number))
+        writer.release()
+        gop = None
+        has_audio = False
+
+    convert: ModuleType = load_script("convert-video-to-image.py")
+    video_info = convert.probe_video(path, convert.video_fingerprint(path))
+    keyframes: List[int] = video_info["keyframes"]
+    return {
+        "path": path,
+        "resolution": f"{width}x{height}",
+        "gop": gop,
+        "frame_count": video_info["frame_count"],
+        "keyframe_interval": video_info["frame_count"] / len(keyframes) if keyframes else None,
+        "has_audio": has_audio,
+    }
+
+def peak_rss_mb() -> Optional[float]:
+    """Largest resident size of this process or any subprocess it waited for, such as ffmpeg."""
+    if resource is None:
+        return None
+    peak: int = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                    resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_stage(stage: str, video: Optional[TestVideo], frames: int, codec: str, crf: int, verbose: bool) -> StageResult:
+    """Run one stage once. Called in a fresh worker process."""
+    result: StageResult = {
+        "stage": stage,
+        "video": os.path.basename(video["path"]) if video else None,
+        "resolution": video["resolution"] if video else None,
+        "gop": video["gop"] if video else None,
+        "status": "ok",
+        "wall_seconds": 0.0,
+        "frames": None,
+        "frames_per_second": None,
+        "calls_per_second": None,
+        "megabytes_in": os.path.getsize(video["path"]) / (1024 * 1024) if video else None,
+        "megabytes_per_second": None,
+        "peak_rss_mb": None,
+    }
+    try:
+        module: ModuleType = load_script("convert-video-to-image.py" if stage == "extract_frames"
+                                         else "categorize-and-compress-video.py")
+    except ImportError as e:
+        result["status"] = f"skipped: {e}"
+        return result
+
+    with tempfile.TemporaryDirectory() as scratch_dir, open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+        start: float = time.perf_counter()
+        if stage == "extract_frames":
+            result["frames"] = module.extract_frames(video["path"], scratch_dir, {"total_frames": frames})
+        elif stage == "extract_audio":
+            if not module.extract_audio(video["path"], os.path.join(scratch_dir, "audio.wav")):
+                result["status"] = "failed"
+        elif stage == "read_audio":
+            if module.read_audio(video["path"]) is None:
+                result["status"] = "failed"
+        elif stage == "compress_video":
+            result["frames"] = video["frame_count"]
+            if not module.compress_video(video["path"], os.path.join(scratch_dir, "compressed.mp4"), codec, crf):
+                result["status"] = "failed"
+        else:
+            for call in range(SANITIZE_CALLS):
+                module.sanitize_filename(SANITIZE_SAMPLES[call % len(SANITIZE_SAMPLES)])
+        elapsed: float = time.perf_counter() - start
+
+    result["wall_seconds"] = elapsed
+    if elapsed > 0:
+        if result["frames"] is not None:
+            result["frames_per_second"] = result["frames"] / elapsed
+        if result["megabytes_in"] is not None:
+            result["megabytes_per_second"] = result["megabytes_in"] / elapsed
+        if stage == "sanitize_filename":
+            result["calls_per_second"] = SANITIZE_CALLS / elapsed
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+def ffmpeg_version() -> Optional[str]:
+    if shutil.which("ffmpeg") is None:
+        return None
+    output: str = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True).stdout
+    return output.splitlines()[0] if output else None
+
+def format_result(result: StageResult) -> str:
+    parts: List[str] = [f"{result['stage']:<18}", f"{result['resolution'] or '':<10}",
+                        f"gop {result['gop'] if result['gop'] is not None else '-':<4}"]
+    if result["status"] != "ok":
+        return " ".join(parts + [result["status"]])
+    parts.append(f"{result['wall_seconds']:8.3f}s")
+    if result["frames_per_second"] is not None:
+        parts.append(f"{result['frames_per_second']:9.1f} frames/s")
+    if result["calls_per_second"] is not None:
+        parts.append(f"{result['calls_per_second']:9.0f} calls/s")
+    if result["megabytes_per_second"] is not None:
+        parts.append(f"{result['megabytes_per_second']:8.2f} MB/s")
+    if result["peak_rss_mb"] is not None:
+        parts.append(f"peak {result['peak_rss_mb']:.0f} MB")
+    return " ".join(parts)
+
+def compare_results(previous_path: str, results: List[StageResult]) -> None:
+    """Print how each stage's wall time changed against a previous results file."""
+    with open(previous_path, 'r') as f:
+        previous: Dict[Tuple, StageResult] = {
+            (result["stage"], result["resolution"], result["gop"]): result for result in json.load(f)["results"]
+        }
+    print(f"\nCompared with {previous_path}:")
+    for result in results:
+        before: Optional[StageResult] = previous.get((result["stage"], result["resolution"], result["gop"]))
+        if before is None or before["status"] != "ok" or result["status"] != "ok" or result["wall_seconds"] <= 0:
+            continue
+        speedup: float = before["wall_seconds"] / result["wall_seconds"]
+        print(f"  {result['stage']:<18} {result['resolution'] or '':<10} gop {result['gop'] if result['gop'] is not None else '-':<4} "
+              f"{before['wall_seconds']:8.3f}s -> {result['wall_seconds']:8.3f}s ({speedup:.2f}x)")
+
+def parse_arguments() -> argparse.Namespace:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description='Benchmark the art pipeline stages on generated test videos.'
+    )
+    parser.add_argument('--resolutions', nargs='+', default=["640x360", "1280x720", "1920x1080"],
+                        help='Test video sizes as WIDTHxHEIGHT')
+    parser.add_argument('--gops', type=int, nargs='+', default=[15, 120],
+                        help='Keyframe intervals of the test videos, in frames (needs ffmpeg)')
+    parser.add_argument('--seconds', type=float, default=4.0,
+                        help='Length of each test video')
+    parser.add_argument('--frames', type=int, default=60,
+                        help='Frames extract_frames takes from each video')
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES,
+                        help='Stages to run')
+    parser.add_argument('--codec', default="libx264", choices=["hevc", "libx264"],
+                        help='Codec for compress_video')
+    parser.add_argument('--crf', type=int, default=23,
+                        help='Quality for compress_video')
+    parser.add_argument('--output', type=str,
+                        default=os.path.join(SCRIPT_DIR, "benchmark-results", f"{datetime.now():%Y%m%d-%H%M%S}.json"),
+                        help='Results file, timestamped under benchmark-results by default')
+    parser.add_argument('--compare', type=str, metavar='RESULTS',
+                        help='Earlier results file to compare wall times against')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Show the output of the stages themselves')
+    return parser.parse_args()
+
+def main() -> None:
+    args: argparse.Namespace = parse_arguments()
+    has_ffmpeg: bool = shutil.which("ffmpeg") is not None
+    if not has_ffmpeg:
+        print("ffmpeg not found: test videos are written by OpenCV without audio, and the ffmpeg stages are skipped")
+
+    results: List[StageResult] = []
+    spawn = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as video_dir:
+        videos: List[TestVideo] = []
+        for resolution in args.resolutions:
+            width, height = parse_resolution(resolution)
+            # OpenCV can't be asked for a keyframe interval, so there is one video per size without ffmpeg
+            for gop in args.gops if has_ffmpeg else args.gops[:1]:
+                video: TestVideo = generate_video(video_dir, width, height, gop, args.seconds)
+                print(f"Generated {os.path.basename(video['path'])}: {video['frame_count']} frames, "
+                      f"keyframe every {video['keyframe_interval'] or 0:.1f} frames")
+                videos.append(video)
+
+        for stage in args.stages:
+            stage_videos: List[Optional[TestVideo]] = [None] if stage == "sanitize_filename" else videos
+            for video in stage_videos:
+                if stage in ("extract_audio", "read_audio", "compress_video") and not has_ffmpeg:
+                    continue
+                if stage in ("extract_audio", "read_audio") and not video["has_audio"]:
+                    continue
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                    result: StageResult = executor.submit(
+                        run_stage, stage, video, args.frames, args.codec, args.crf, args.verbose).result()
+                print(format_result(result))
+                results.append(result)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "ffmpeg": ffmpeg_version(),
+            "settings": {"seconds": args.seconds, "frames": args.frames, "codec": args.codec, "crf": args.crf},
+            "videos": videos,
+            "results": results,
+        }, f, indent=4)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        compare_results(args.compare, results)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 import os
-import subprocess
+import torch
 import whisper
 import re
-import tempfile
+import numpy as np
 import argparse
 import shutil
+import collections
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pipeline_events
 
 # --- Helper Function: Sanitize Filename ---
 def sanitize_filename(text):
@@ -63,7 +70,8 @@ def extract_audio(video_file, temp_audio_path):
             '-y',              # Overwrite output file if it exists
             temp_audio_path
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False) # Don't check=True here, handle below
+        # Don't check here, handle below
+        result = pipeline_events.run("extract_audio", cmd, inputs=[video_file], outputs=[temp_audio_path])
 
         if result.returncode != 0:
             print(f"  FFmpeg audio extraction error: {result.stderr}")
@@ -74,25 +82,128 @@ def extract_audio(video_file, temp_audio_path):
         print(f"  Error during audio extraction: {str(e)}")
         return False
 
+# --- Helper Function: Read Audio ---
+AUDIO_SAMPLE_RATE = 16000 # Sample rate Whisper is trained on
+
+def read_audio(video_file, max_seconds=None):
+    """
+    Decodes the audio of a video with FFmpeg straight into memory, as 16kHz mono float32
+    samples ready for Whisper, without a WAV file in between.
+    max_seconds stops FFmpeg once it has decoded that much.
+    Returns the samples, or None on failure.
+    """
+    print(f"  Reading audio from: {os.path.basename(video_file)}")
+    cmd = ['ffmpeg', '-nostdin', '-i', video_file]
+    if max_seconds:
+        cmd.extend(['-t', str(max_seconds)])
+    cmd.extend([
+        '-vn',             # No video output
+        '-f', 's16le',     # Raw 16-bit samples to stdout
+        '-ac', '1',        # Mono audio
+        '-ar', str(AUDIO_SAMPLE_RATE),
+        '-'
+    ])
+    try:
+        result = pipeline_events.run("read_audio", cmd, inputs=[video_file], text=False)
+        if result.returncode != 0:
+            print(f"  FFmpeg audio read error: {result.stderr.decode(errors='replace')}")
+            return None
+        return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+    except Exception as e:
+        print(f"  Error during audio read: {str(e)}")
+        return None
+
 # --- Helper Function: Transcribe Audio ---
-def transcribe_audio(audio_path, model):
+# Only the start of each clip is transcribed, sanitize_filename keeps 100 characters anyway.
+# Whisper looks at 30 second windows, so that's the most one pass can use.
+DEFAULT_TRANSCRIBE_SECONDS = 30
+DEFAULT_TRANSCRIBE_BATCH_SIZE = 8
+
+def transcribe_clips(clips, model, seconds=DEFAULT_TRANSCRIBE_SECONDS):
     """
-    Transcribes the given audio file using the loaded Whisper model.
-    Returns the transcribed text or None if transcription fails.
+    Transcribes the first `seconds` of each clip in one batched decoding pass.
+    Clips are samples from read_audio, or paths of audio files.
+    The clips' log-mel windows are stacked so the model runs once for the whole batch.
+    Returns a list with the text of each clip, or None where transcription failed.
     """
-    print(f"  Transcribing audio...")
+    print(f"  Transcribing {len(clips)} clips...")
+    mels = []
+    texts = [None] * len(clips)
+    loaded = []
+    for i, clip in enumerate(clips):
+        try:
+            audio = whisper.load_audio(clip) if isinstance(clip, str) else clip
+            audio = audio[:int(seconds * AUDIO_SAMPLE_RATE)]
+            mels.append(whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=model.dims.n_mels))
+            loaded.append(i)
+        except Exception as e:
+            print(f"  Error loading audio of clip {i + 1}: {str(e)}")
+    if not loaded:
+        return texts
+
     try:
-        result = model.transcribe(audio_path, fp16=False) # fp16=False for wider compatibility if no GPU
-        transcription = result["text"]
+        with pipeline_events.stage("transcribe", clips=len(loaded), seconds_per_clip=seconds):
+            batch = torch.stack(mels).to(model.device)
+            options = whisper.DecodingOptions(fp16=False, without_timestamps=True) # fp16=False for wider compatibility if no GPU
+            results = whisper.decode(model, batch, options)
+        for i, result in zip(loaded, results):
+            texts[i] = result.text
         print(f"  Transcription successful.")
-        # print(f"  Raw Transcription: '{transcription}'") # Optional: for debugging
-        return transcription
     except Exception as e:
         print(f"  Error during Whisper transcription: {str(e)}")
-        return None
+    return texts
+
+def transcribe_audio(audio_path, model, seconds=DEFAULT_TRANSCRIBE_SECONDS):
+    """
+    Transcribes the given audio file using the loaded Whisper model.
+    Returns the transcribed text or None if transcription fails.
+    """
+    return transcribe_clips([audio_path], model, seconds)[0]
+
+# --- Transcription Worker Processes ---
+# Each worker loads the model once, then transcribes batch after batch with it
+_worker_model = None
+
+def _load_worker_model(whisper_model_name):
+    global _worker_model
+    _worker_model = whisper.load_model(whisper_model_name)
+
+def _transcribe_in_worker(clips, seconds):
+    return transcribe_clips(clips, _worker_model, seconds)
+
+class Transcriber:
+    """
+    Loads the Whisper model once and transcribes batches of clips on it, returning futures.
+    With workers > 0 the batches spread over that many processes, each with its own model;
+    otherwise they run one at a time on a single thread of this process.
+    Raises if the model can't be loaded here.
+    """
+    def __init__(self, whisper_model_name, seconds=DEFAULT_TRANSCRIBE_SECONDS, workers=0):
+        self.seconds = seconds
+        self.parallelism = max(1, workers)
+        print(f"Loading Whisper model: {whisper_model_name}" + (f" in {workers} worker processes..." if workers > 0 else "..."))
+        if workers > 0:
+            # Spawned rather than forked: forking while the audio and encode threads run can deadlock the child
+            self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                                initializer=_load_worker_model, initargs=(whisper_model_name,))
+            self.model = None
+        else:
+            with pipeline_events.stage("load_whisper_model", model=whisper_model_name):
+                self.model = whisper.load_model(whisper_model_name)
+            print("Whisper model loaded successfully.")
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcribe")
+
+    def submit(self, clips):
+        """Transcribe a batch of clips; the future's result is their texts, None where one failed."""
+        if self.model is None:
+            return self.executor.submit(_transcribe_in_worker, clips, self.seconds)
+        return self.executor.submit(transcribe_clips, clips, self.model, self.seconds)
+
+    def close(self):
+        self.executor.shutdown()
 
 # --- Modified Compression Function ---
-def compress_video(input_file, output_file, codec="hevc", crf=23, max_bitrate=None):
+def compress_video(input_file, output_file, codec="hevc", crf=23, max_bitrate=None, threads=0):
     """
     Compress a video file using FFmpeg. (Function signature unchanged, but usage context changes)
     :param input_file: Path to the input MOV file
@@ -100,6 +211,7 @@ def compress_video(input_file, output_file, codec="hevc", crf=23, max_bitrate=No
     :param codec: Video codec to use (e.g., "hevc" for H.265 or "libx264" for H.264)
     :param crf: Quality parameter (18-28, lower is better quality)
     :param max_bitrate: Maximum bitrate in Mbps (e.g., "4M" for 4 Mbps)
+    :param threads: Encoder threads, 0 lets FFmpeg decide (usually every core)
     """
     print(f"  Compressing video to: {os.path.basename(output_file)}")
     try:
@@ -115,6 +227,8 @@ def compress_video(input_file, output_file, codec="hevc", crf=23, max_bitrate=No
             '-b:a', '128k',    # Decent audio bitrate
             '-y'               # Overwrite output file if it exists
         ]
+        if threads:
+            cmd.extend(['-threads', str(threads)])
 
         # Add maxrate and bufsize if specified
         if max_bitrate:
@@ -142,7 +256,8 @@ def compress_video(input_file, output_file, codec="hevc", crf=23, max_bitrate=No
 
         # Run the FFmpeg process
         # print(f"  Running FFmpeg command: {' '.join(cmd)}") # Debugging
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False) # Handle error below
+        # Handle error below
+        result = pipeline_events.run("compress_video", cmd, inputs=[input_file], outputs=[output_file], codec=codec, crf=crf)
 
         if result.returncode != 0:
             print(f"  FFmpeg compression error: {result.stderr}")
@@ -168,135 +283,204 @@ def compress_video(input_file, output_file, codec="hevc", crf=23, max_bitrate=No
                  print(f"  Warning: Could not delete incomplete output file {os.path.basename(output_file)}: {oe}")
         return False
 
-# --- Modified Batch Processing Function ---
-def batch_process_recursive(root_directory, codec="hevc", crf=23, whisper_model_name="base"):
+# --- Helper Function: Name Output ---
+def choose_output_file(input_file, transcribed_text, reserved_outputs):
+    """
+    Names the output after the transcription, avoiding existing files and names already
+    reserved for encodes still running. Returns the path, reserved, or None if there were
+    too many collisions.
+    """
+    dirpath = os.path.dirname(input_file)
+
+    # Generate Filename
+    base_output_name = sanitize_filename(transcribed_text)
+    output_file = os.path.join(dirpath, f"{base_output_name}.mp4")
+
+    # Check for potential filename collision (optional but recommended)
+    counter = 1
+    while os.path.exists(output_file) or output_file in reserved_outputs:
+         print(f"  Warning: Output file '{os.path.basename(output_file)}' already exists.")
+         output_file = os.path.join(dirpath, f"{base_output_name}-{counter}.mp4")
+         print(f"  Attempting new name: '{os.path.basename(output_file)}'")
+         counter += 1
+         if counter > 10: # Safety break to prevent infinite loop
+             print("  Too many filename collisions. Skipping this file.")
+             return None
+    reserved_outputs.add(output_file)
+    return output_file
+
+# --- Helper Function: Compress and Report ---
+def compress_and_report(input_file, output_file, codec="hevc", crf=23, threads=0):
+    """
+    Compresses to the chosen output and prints the size reduction.
+    Returns True on success, False on failure.
+    """
+    filename = os.path.basename(input_file)
+    if not compress_video(input_file, output_file, codec, crf, threads=threads):
+        print(f"  Compression failed for: {filename}")
+        return False
+
+    # Calculate size reduction
+    try:
+        original_size = os.path.getsize(input_file)
+        compressed_size = os.path.getsize(output_file)
+        reduction_percent = ((original_size - compressed_size) / original_size) * 100 if original_size > 0 else 0
+
+        print(f"Successfully processed: {filename} -> {os.path.basename(output_file)}")
+        print(f"  Original size: {original_size / (1024 * 1024):.2f} MB")
+        print(f"  Compressed size: {compressed_size / (1024 * 1024):.2f} MB")
+        print(f"  Reduction: {reduction_percent:.2f}%")
+    except FileNotFoundError:
+         print("  Error calculating file sizes (file might have been moved or deleted).")
+    except ZeroDivisionError:
+         print("  Original file size is zero. Cannot calculate reduction.")
+    return True
+
+def find_mov_files(root_directory):
+    """All .mov files under root_directory, skipping hidden folders like .git."""
+    mov_files = []
+    for dirpath, dirnames, filenames in os.walk(root_directory):
+        # Filter out directories starting with '.' to avoid hidden ones like .git
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for filename in filenames:
+            # Case-insensitive check for .mov extension
+            if filename.lower().endswith('.mov'):
+                mov_files.append(os.path.join(dirpath, filename))
+    return mov_files
+
+# --- Batch Processing Function ---
+DEFAULT_AUDIO_JOBS = 2
+# One encode at a time by default; FFmpeg's HEVC encoder already uses every core
+DEFAULT_ENCODE_JOBS = 1
+
+def batch_process_recursive(root_directory, codec="hevc", crf=23, whisper_model_name="base",
+                            transcribe_seconds=DEFAULT_TRANSCRIBE_SECONDS,
+                            batch_size=DEFAULT_TRANSCRIBE_BATCH_SIZE, transcribe_workers=0,
+                            audio_jobs=DEFAULT_AUDIO_JOBS, encode_jobs=DEFAULT_ENCODE_JOBS, encode_threads=0):
     """
     Recursively search for MOV files, extract audio, transcribe, generate filename,
     and compress to MP4 format.
+    The three steps run as a pipeline with their own workers, so clips are being read,
+    transcribed and encoded at the same time: audio reads run audio_jobs at a time, ahead of
+    transcription by at most a few batches, and each transcribed clip is queued for one of
+    encode_jobs encodes. Outputs are named, and results reported, in the order clips were found.
 
     :param root_directory: The root directory to start the search
     :param codec: Video codec to use
     :param crf: Quality parameter
     :param whisper_model_name: Name of the Whisper model to load (e.g., "tiny", "base", "small", "medium", "large")
+    :param transcribe_seconds: How much of the start of each clip to transcribe, at most 30
+    :param batch_size: Clips transcribed together in one pass of the model
+    :param transcribe_workers: Worker processes for transcription, each loading the model once; 0 transcribes here
+    :param audio_jobs: Clips having their audio read at once
+    :param encode_jobs: Videos being compressed at once
+    :param encode_threads: Threads per encode, 0 lets FFmpeg decide; lower it to leave cores for transcription
     """
     # Check if FFmpeg is available
     if shutil.which("ffmpeg") is None:
         print("Error: FFmpeg not found. Please install FFmpeg and ensure it's in your system's PATH.")
         return
 
+    mov_files = find_mov_files(root_directory)
+    print(f"Found {len(mov_files)} MOV files")
+
     # Load Whisper model
-    print(f"Loading Whisper model: {whisper_model_name}...")
     try:
-        model = whisper.load_model(whisper_model_name)
-        print("Whisper model loaded successfully.")
+        transcriber = Transcriber(whisper_model_name, transcribe_seconds, transcribe_workers)
     except Exception as e:
         print(f"Error loading Whisper model '{whisper_model_name}': {str(e)}")
         print("Please ensure the model name is correct and dependencies are installed.")
         return
 
-    # Count for statistics
-    total_files = 0
-    successful_processing = 0
-    failed_processing = 0
-
-    # Walk through all directories and files
-    for dirpath, dirnames, filenames in os.walk(root_directory):
-        # Filter out directories starting with '.' to avoid hidden ones like .git
-        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+    # Smaller batches rather than idle transcription workers
+    batch_size = max(1, min(batch_size, -(-len(mov_files) // transcriber.parallelism)))
+    # Clips read but not yet transcribed, so audio reading can't run far ahead
+    pending_audio = threading.Semaphore(batch_size * (transcriber.parallelism + 1))
+    read_futures = queue.Queue()
+    results = {}
+    encode_futures = {}
+    reserved_outputs = set()
 
-        for filename in filenames:
-            # Case-insensitive check for .mov extension
-            if filename.lower().endswith('.mov'):
-                total_files += 1
-                input_file = os.path.join(dirpath, filename)
-                print(f"\nProcessing: {input_file}")
+    with ThreadPoolExecutor(max_workers=audio_jobs, thread_name_prefix="audio") as audio_pool, \
+            ThreadPoolExecutor(max_workers=encode_jobs, thread_name_prefix="encode") as encode_pool:
 
-                temp_audio_file = None
-                transcribed_text = None
-                output_file = None
-                success = False
+        def read_all_audio():
+            for input_file in mov_files:
+                pending_audio.acquire()
+                read_futures.put((input_file, audio_pool.submit(read_audio, input_file, transcribe_seconds)))
 
+        def finish_batch(batch_files, future):
+            try:
+                texts = future.result()
+            except Exception as e:
+                print(f"  Error in the transcription workers: {str(e)}")
+                texts = [None] * len(batch_files)
+            for input_file, transcribed_text in zip(batch_files, texts):
+                pending_audio.release()
+                if transcribed_text is None:
+                    print(f"  Skipping {os.path.basename(input_file)} due to transcription failure.")
+                    results[input_file] = "transcription failed"
+                    continue
+                output_file = choose_output_file(input_file, transcribed_text, reserved_outputs)
+                if output_file is None:
+                    results[input_file] = "too many filename collisions"
+                    continue
+                results[input_file] = os.path.basename(output_file)
+                encode_futures[input_file] = encode_pool.submit(
+                    compress_and_report, input_file, output_file, codec, crf, encode_threads)
+
+        reader = threading.Thread(target=read_all_audio, name="audio-feeder", daemon=True)
+        reader.start()
+
+        # Transcribe batches in order as their audio arrives, at most one more than can run at once
+        in_flight = collections.deque()
+        batch_files, batch_clips = [], []
+        for _ in mov_files:
+            input_file, read_future = read_futures.get()
+            audio = read_future.result()
+            if audio is None:
+                print(f"  Skipping {os.path.basename(input_file)} due to audio extraction failure.")
+                results[input_file] = "audio extraction failed"
+                pending_audio.release()
+                continue
+            batch_files.append(input_file)
+            batch_clips.append(audio)
+            if len(batch_files) == batch_size:
+                in_flight.append((batch_files, transcriber.submit(batch_clips)))
+                batch_files, batch_clips = [], []
+            while in_flight and (len(in_flight) > transcriber.parallelism or in_flight[0][1].done()):
+                finish_batch(*in_flight.popleft())
+        if batch_files:
+            in_flight.append((batch_files, transcriber.submit(batch_clips)))
+        while in_flight:
+            finish_batch(*in_flight.popleft())
+        transcriber.close()
+
+        # Collect the encodes in input order
+        successful_processing = 0
+        failed_processing = 0
+        print("\n--- Results ---")
+        for input_file in mov_files:
+            succeeded = False
+            if input_file in encode_futures:
                 try:
-                    # 1. Create a temporary file for audio extraction
-                    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_f:
-                        temp_audio_file = temp_f.name
-
-                    # 2. Extract Audio
-                    if not extract_audio(input_file, temp_audio_file):
-                        print(f"  Skipping file due to audio extraction failure.")
-                        failed_processing += 1
-                        continue # Move to the next file
-
-                    # 3. Transcribe Audio
-                    transcribed_text = transcribe_audio(temp_audio_file, model)
-                    if transcribed_text is None:
-                        print(f"  Skipping file due to transcription failure.")
-                        failed_processing += 1
-                        continue # Move to the next file
-
-                    # 4. Generate Filename
-                    base_output_name = sanitize_filename(transcribed_text)
-                    output_file = os.path.join(dirpath, f"{base_output_name}.mp4")
-
-                    # Check for potential filename collision (optional but recommended)
-                    counter = 1
-                    original_output_file = output_file
-                    while os.path.exists(output_file):
-                         print(f"  Warning: Output file '{os.path.basename(output_file)}' already exists.")
-                         output_file = os.path.join(dirpath, f"{base_output_name}-{counter}.mp4")
-                         print(f"  Attempting new name: '{os.path.basename(output_file)}'")
-                         counter += 1
-                         if counter > 10: # Safety break to prevent infinite loop
-                             print("  Too many filename collisions. Skipping this file.")
-                             failed_processing += 1
-                             output_file = None # Ensure we don't try to compress
-                             break
-                    if output_file is None: # Check if skipped due to collisions
-                        continue
-
-                    # 5. Compress Video
-                    if compress_video(input_file, output_file, codec, crf):
-                        successful_processing += 1
-                        success = True
-
-                        # Calculate size reduction
-                        try:
-                            original_size = os.path.getsize(input_file)
-                            compressed_size = os.path.getsize(output_file)
-                            reduction_percent = ((original_size - compressed_size) / original_size) * 100 if original_size > 0 else 0
-
-                            print(f"Successfully processed: {filename} -> {os.path.basename(output_file)}")
-                            print(f"  Original size: {original_size / (1024 * 1024):.2f} MB")
-                            print(f"  Compressed size: {compressed_size / (1024 * 1024):.2f} MB")
-                            print(f"  Reduction: {reduction_percent:.2f}%")
-                        except FileNotFoundError:
-                             print("  Error calculating file sizes (file might have been moved or deleted).")
-                        except ZeroDivisionError:
-                             print("  Original file size is zero. Cannot calculate reduction.")
-
-                    else:
-                        failed_processing += 1
-                        print(f"  Compression failed for: {filename}")
-
+                    succeeded = encode_futures[input_file].result()
                 except Exception as e:
-                    print(f"  An unexpected error occurred processing {filename}: {str(e)}")
-                    failed_processing += 1
-                finally:
-                    # 6. Cleanup Temporary Audio File
-                    if temp_audio_file and os.path.exists(temp_audio_file):
-                        try:
-                            os.remove(temp_audio_file)
-                            # print(f"  Cleaned up temporary audio file: {temp_audio_file}")
-                        except OSError as oe:
-                            print(f"  Warning: Could not delete temporary audio file {temp_audio_file}: {oe}")
-
+                    print(f"  An unexpected error occurred processing {os.path.basename(input_file)}: {str(e)}")
+                if not succeeded:
+                    results[input_file] = "compression failed"
+            if succeeded:
+                successful_processing += 1
+                print(f"  {input_file} -> {results[input_file]}")
+            else:
+                failed_processing += 1
+                print(f"  {input_file}: {results[input_file]}")
 
     # Print summary
     print("\n--- Processing Summary ---")
-    print(f"Total MOV files found: {total_files}")
+    print(f"Total MOV files found: {len(mov_files)}")
     print(f"Successfully processed & compressed: {successful_processing}")
     print(f"Failed processing/compression: {failed_processing}")
-    # print(f"Skipped files (e.g., extraction/transcription errors): {skipped_files}") # Redundant if counted in failed
 
 # --- Main Execution Block ---
 if __name__ == "__main__":
@@ -305,6 +489,13 @@ if __name__ == "__main__":
     parser.add_argument("--codec", default="hevc", choices=["hevc", "libx264"], help="Video codec (default: hevc)")
     parser.add_argument("--crf", type=int, default=23, help="Quality parameter (default: 23, lower is better quality, 18-28 typical range)")
     parser.add_argument("--whisper-model", default="base", choices=["tiny", "base", "small", "medium", "large"], help="Whisper model size (default: base)")
+    parser.add_argument("--transcribe-seconds", type=float, default=DEFAULT_TRANSCRIBE_SECONDS, help=f"Seconds from the start of each clip to transcribe, at most 30 (default: {DEFAULT_TRANSCRIBE_SECONDS})")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_TRANSCRIBE_BATCH_SIZE, help=f"Clips transcribed together in one pass of the model (default: {DEFAULT_TRANSCRIBE_BATCH_SIZE})")
+    parser.add_argument("--transcribe-workers", type=int, default=0, help="Worker processes transcribing in parallel, each loading the model once (default: 0, transcribe in this process)")
+    parser.add_argument("--audio-jobs", type=int, default=DEFAULT_AUDIO_JOBS, help=f"Clips having their audio read at once (default: {DEFAULT_AUDIO_JOBS})")
+    parser.add_argument("--encode-jobs", type=int, default=DEFAULT_ENCODE_JOBS, help=f"Videos compressed at once, alongside transcription (default: {DEFAULT_ENCODE_JOBS})")
+    parser.add_argument("--encode-threads", type=int, default=0, help="Threads per FFmpeg encode, lower it to leave cores for transcription (default: 0, FFmpeg decides)")
+    pipeline_events.add_arguments(parser)
     # parser.add_argument("--max-bitrate", default=None, help="Maximum video bitrate (e.g., '4M' for 4 Mbps, optional)") # Example if you want max bitrate back
 
     args = parser.parse_args()
@@ -317,6 +508,11 @@ if __name__ == "__main__":
         print(f"Using Whisper model: {args.whisper_model}")
         # print(f"Max bitrate: {args.max_bitrate if args.max_bitrate else 'Not set'}")
 
-        batch_process_recursive(args.directory, args.codec, args.crf, args.whisper_model)
+        pipeline_events.configure(args.event_log, args.trace)
+        with pipeline_events.stage("batch_process_recursive", directory=args.directory):
+            batch_process_recursive(args.directory, args.codec, args.crf, args.whisper_model,
+                                    min(args.transcribe_seconds, DEFAULT_TRANSCRIBE_SECONDS), args.batch_size, args.transcribe_workers,
+                                    args.audio_jobs, args.encode_jobs, args.encode_threads)
+        pipeline_events.finish()
 
         print("\nProcessing finished.")
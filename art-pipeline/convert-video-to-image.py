@@ -1,22 +1,395 @@
 import cv2
+import numpy as np
 import os
 import json
 import shutil
+import subprocess
 import argparse
-from typing import List, Set, Tuple, Optional, TypedDict
+import bisect
+import hashlib
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Set, Tuple, Optional, TypedDict
+
+import pipeline_events
 
 # Define a TypedDict for the settings structure with required total_frames field
-class VideoSettings(TypedDict):
+class RequiredVideoSettings(TypedDict):
     total_frames: int
 
+# Optional settings: selection is "even" (default) or "sharp", crop is [x, y, width, height]
+# in source pixels, and max_dimension caps the longer side of the written frames
+class VideoSettings(RequiredVideoSettings, total=False):
+    selection: str
+    crop: List[int]
+    max_dimension: int
+
+# Define a TypedDict for how extracted frames are encoded
+class EncodeOptions(TypedDict):
+    image_format: str
+    png_compression: int
+    encoder_threads: int
+    queue_depth: int
+
+DEFAULT_ENCODE_OPTIONS: EncodeOptions = {
+    "image_format": "png",
+    "png_compression": 3,
+    "encoder_threads": 4,
+    "queue_depth": 16,
+}
+
+# File extension per output format; all lossless except jpg, which is written at high quality
+IMAGE_EXTENSIONS: Dict[str, str] = {"png": ".png", "webp": ".webp", "tiff": ".tiff", "jpg": ".jpg"}
+
+def image_write_params(options: EncodeOptions) -> List[int]:
+    """cv2.imwrite parameters for the chosen output format."""
+    image_format: str = options["image_format"]
+    if image_format == "png":
+        return [cv2.IMWRITE_PNG_COMPRESSION, options["png_compression"]]
+    if image_format == "webp":
+        # Quality above 100 selects lossless WebP
+        return [cv2.IMWRITE_WEBP_QUALITY, 101]
+    if image_format == "jpg":
+        return [cv2.IMWRITE_JPEG_QUALITY, 95]
+    return []
+
+def is_frame_file(filename: str, image_format: str) -> bool:
+    """Check if a file is an extracted frame in the given format."""
+    return filename.startswith("frame_") and filename.endswith(IMAGE_EXTENSIONS[image_format])
+
+def frame_path(output_subfolder_path: str, frame_number: int, image_format: str) -> str:
+    """Path of a numbered frame in the given format."""
+    return os.path.join(output_subfolder_path, f"frame_{frame_number:06d}{IMAGE_EXTENSIONS[image_format]}")
+
+class FrameWriter:
+    """
+    Encodes frames on a pool of threads fed by a bounded queue, so decoding carries on
+    while earlier frames compress. cv2.imwrite releases the GIL while encoding.
+    Memory is capped at queue_depth frames waiting plus one per encoder thread.
+    """
+    def __init__(self, options: EncodeOptions) -> None:
+        self.params: List[int] = image_write_params(options)
+        self.frames: "queue.Queue[Optional[Tuple[str, cv2.typing.MatLike, Optional[Callable]]]]" = queue.Queue(maxsize=options["queue_depth"])
+        self.errors: List[str] = []
+        self.threads: List[threading.Thread] = [
+            threading.Thread(target=self._encode, daemon=True) for _ in range(max(1, options["encoder_threads"]))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _encode(self) -> None:
+        while True:
+            item = self.frames.get()
+            if item is None:
+                return
+            frame_path, frame, on_written = item
+            try:
+                if not cv2.imwrite(frame_path, frame, self.params):
+                    self.errors.append(frame_path)
+            except Exception as e:
+                # Keep draining the queue, so the decoder is never left blocked on a full queue
+                self.errors.append(f"{frame_path} ({str(e).strip()})")
+            finally:
+                if on_written is not None:
+                    on_written(frame)
+
+    def write(
+        self,
+        frame_path: str,
+        frame: "cv2.typing.MatLike",
+        on_written: Optional[Callable[["cv2.typing.MatLike"], None]] = None,
+    ) -> None:
+        """
+        Queue a frame for encoding, blocking while the queue is full.
+        on_written is called with the frame once it's encoded, eg. to reuse its buffer.
+        Raises as soon as a frame has failed to write, rather than decoding the rest of the video.
+        """
+        self._put((frame_path, frame, on_written), check_errors=True)
+
+    def _put(self, item: Optional[Tuple[str, "cv2.typing.MatLike", Optional[Callable]]], check_errors: bool) -> None:
+        # Wait in short steps, so a failed or dead writer can't leave the caller blocked forever
+        while True:
+            if check_errors and self.errors:
+                self._raise_errors()
+            if not any(thread.is_alive() for thread in self.threads):
+                if check_errors:
+                    raise IOError("Frame encoder threads stopped unexpectedly")
+                return
+            try:
+                self.frames.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                pass
+
+    def _raise_errors(self) -> None:
+        raise IOError(f"Failed to write {len(self.errors)} frames, first: {self.errors[0]}")
+
+    def close(self) -> None:
+        """Wait for every queued frame to be written."""
+        for _ in self.threads:
+            self._put(None, check_errors=False)
+        for thread in self.threads:
+            thread.join()
+        if self.errors:
+            self._raise_errors()
+
+def open_video(video_path: str, hardware_decode: bool = False) -> cv2.VideoCapture:
+    """Open a video, asking the backend for hardware decoding if wanted. Backends without it decode in software."""
+    if hardware_decode:
+        return cv2.VideoCapture(video_path, cv2.CAP_ANY, [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+    return cv2.VideoCapture(video_path)
+
+def downscaled_size(width: int, height: int, max_dimension: int) -> Tuple[int, int]:
+    """Shrink width x height to fit max_dimension on the longer side, never enlarging; 0 means no limit."""
+    if max_dimension > 0 and max(width, height) > max_dimension:
+        scale: float = max_dimension / max(width, height)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+    return width, height
+
+def clamp_crop(width: int, height: int, crop: List[int]) -> Tuple[int, int, int, int]:
+    """The crop rectangle clipped to a width x height frame. Raises ValueError if none of the frame is left."""
+    x, y, crop_width, crop_height = crop
+    left, top = max(0, x), max(0, y)
+    right, bottom = min(width, x + crop_width), min(height, y + crop_height)
+    if right <= left or bottom <= top:
+        raise ValueError(f"Crop {list(crop)} is outside the {width}x{height} frame")
+    return left, top, right - left, bottom - top
+
+def output_resolution(width: int, height: int, settings: VideoSettings) -> Tuple[int, int]:
+    """Size of the frames written for a width x height video after cropping and downscaling."""
+    if "crop" in settings:
+        _, _, width, height = clamp_crop(width, height, settings["crop"])
+    return downscaled_size(width, height, settings.get("max_dimension", 0))
+
+def crop_and_downscale(frame: "cv2.typing.MatLike", settings: VideoSettings) -> "cv2.typing.MatLike":
+    """Crop and shrink a decoded frame per the settings, before it's queued for encoding."""
+    if "crop" in settings:
+        x, y, crop_width, crop_height = clamp_crop(frame.shape[1], frame.shape[0], settings["crop"])
+        frame = frame[y:y + crop_height, x:x + crop_width]
+    height, width = frame.shape[:2]
+    output_width, output_height = downscaled_size(width, height, settings.get("max_dimension", 0))
+    if (output_width, output_height) != (width, height):
+        frame = cv2.resize(frame, (output_width, output_height), interpolation=cv2.INTER_AREA)
+    return frame
+
+# Typical keyframe spacing of phone and camera footage, used when the real spacing is unknown
+DEFAULT_KEYFRAME_INTERVAL_SECONDS: float = 2.0
+
+def read_frames_sequential(video: cv2.VideoCapture, frame_indices: List[int]) -> Iterator[Tuple[int, "cv2.typing.MatLike"]]:
+    """
+    Decode forward once, only converting the target frames.
+    grab() advances past skipped frames without the colour conversion and copy retrieve() does.
+    """
+    position: int = 0
+    for target in sorted(set(frame_indices)):
+        while position < target:
+            if not video.grab():
+                return
+            position += 1
+        if not video.grab():
+            return
+        position += 1
+        success, frame = video.retrieve()
+        if success:
+            yield target, frame
+
+def read_frames_seeking(video: cv2.VideoCapture, frame_indices: List[int]) -> Iterator[Tuple[int, "cv2.typing.MatLike"]]:
+    """Seek to each target frame. Every seek decodes again from the previous keyframe."""
+    for frame_idx in frame_indices:
+        video.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        success, frame = video.read()
+        if success:
+            yield frame_idx, frame
+
+class FrameBufferPool:
+    """
+    Preallocated frame buffers handed out for decoding into and returned once encoded,
+    so a long extraction reuses the same few allocations.
+    """
+    def __init__(self, width: int, height: int, count: int) -> None:
+        self.frame_bytes: int = width * height * 3
+        self.free: "queue.Queue[np.ndarray]" = queue.Queue()
+        for _ in range(count):
+            self.free.put(np.empty((height, width, 3), dtype=np.uint8))
+
+    def acquire(self) -> np.ndarray:
+        """Take a free buffer, waiting for the encoder to give one back if there are none."""
+        return self.free.get()
+
+    def release(self, buffer: np.ndarray) -> None:
+        self.free.put(buffer)
+
+def ffmpeg_filters(frame_indices: List[int], width: int, height: int, settings: VideoSettings) -> str:
+    """Filter chain keeping exactly the target frames by decoded frame number, then cropping and scaling them."""
+    selected: str = "+".join(f"eq(n\\,{index})" for index in sorted(set(frame_indices)))
+    filters: List[str] = [f"select='{selected}'"]
+    if "crop" in settings:
+        x, y, crop_width, crop_height = clamp_crop(width, height, settings["crop"])
+        filters.append(f"crop={crop_width}:{crop_height}:{x}:{y}")
+    if settings.get("max_dimension", 0) > 0:
+        output_width, output_height = output_resolution(width, height, settings)
+        filters.append(f"scale={output_width}:{output_height}:flags=area")
+    return ",".join(filters)
+
+def read_frames_ffmpeg(
+    video_path: str,
+    frame_indices: List[int],
+    width: int,
+    height: int,
+    settings: VideoSettings,
+    buffers: FrameBufferPool,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Decode in one ffmpeg process that outputs only the target frames as raw BGR over a pipe,
+    already cropped and scaled, read straight into buffers from the pool.
+    Selecting by decoded frame number is exact even on variable frame rate footage, where
+    OpenCV's seeking can land on a neighbouring frame.
+    The caller returns each buffer to the pool once it's done with the frame.
+    """
+    cmd: List[str] = [
+        "ffmpeg", "-v", "error", "-i", video_path,
+        "-map", "0:v:0", "-vf", ffmpeg_filters(frame_indices, width, height, settings),
+        "-vsync", "0", "-f", "rawvideo", "-pix_fmt", "bgr24", "-",
+    ]
+    # Recorded like pipeline_events.run; the event spans the whole stream, so it includes time spent
+    # waiting on the caller while it encodes
+    with pipeline_events.stage("ffmpeg_decode", command=" ".join(cmd), video=video_path) as event:
+        event["bytes_in"] = os.path.getsize(video_path)
+        frames: int = 0
+        # stderr goes to a file, since a pipe nobody reads until stdout ends fills up on a damaged
+        # stream's decode errors and stalls ffmpeg while we wait on stdout
+        stderr_file = tempfile.TemporaryFile()
+        process: subprocess.Popen = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+        try:
+            for frame_idx in sorted(set(frame_indices)):
+                buffer: np.ndarray = buffers.acquire()
+                view: memoryview = memoryview(buffer).cast("B")
+                filled: int = 0
+                while filled < buffers.frame_bytes:
+                    count: int = process.stdout.readinto(view[filled:])
+                    if not count:
+                        break
+                    filled += count
+                if filled < buffers.frame_bytes:
+                    buffers.release(buffer)
+                    break
+                frames += 1
+                yield frame_idx, buffer
+        finally:
+            process.stdout.close()
+            returncode: int = process.wait()
+            stderr_file.seek(0)
+            stderr: str = stderr_file.read().decode(errors="replace")
+            stderr_file.close()
+            event["exit_code"] = returncode
+            event["frames"] = frames
+            event["bytes_out"] = frames * buffers.frame_bytes
+            if returncode != 0:
+                event["status"] = "failed"
+                if stderr:
+                    print(f"ffmpeg error on {os.path.basename(video_path)}: {stderr.strip()}")
+
+# Sharp selection scores this many evenly spaced candidates in each window
+CANDIDATES_PER_WINDOW: int = 8
+# Mean absolute difference (0-255) of small greyscale thumbnails below which a frame repeats the last one kept
+MIN_FRAME_DIFFERENCE: float = 2.0
+
+def frame_scores(frame: "cv2.typing.MatLike") -> Tuple[float, "cv2.typing.MatLike"]:
+    """Laplacian-variance sharpness of the frame, and a small thumbnail for comparing frames."""
+    grey = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    # Half resolution keeps real detail while ignoring sensor noise
+    half = cv2.resize(grey, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+    sharpness: float = float(cv2.Laplacian(half, cv2.CV_64F).var())
+    thumbnail = cv2.resize(grey, (64, 36), interpolation=cv2.INTER_AREA)
+    return sharpness, thumbnail
+
+def read_frames_sharpest(
+    video: cv2.VideoCapture,
+    video_frames: int,
+    total_frames: int,
+) -> Iterator[Tuple[int, "cv2.typing.MatLike"]]:
+    """
+    Split the video into total_frames windows and keep the sharpest candidate of each,
+    in one sequential pass holding at most one frame per window.
+    A window's pick is dropped when it barely differs from the previous kept frame
+    (a handheld pause), so fewer frames than windows may come out.
+    """
+    window_size: float = video_frames / max(1, total_frames)
+    candidates: List[int] = sorted({
+        int(window * window_size + candidate * window_size / CANDIDATES_PER_WINDOW)
+        for window in range(total_frames)
+        for candidate in range(CANDIDATES_PER_WINDOW)
+    })
+    last_thumbnail = None
+    best: Optional[Tuple[float, int, "cv2.typing.MatLike", "cv2.typing.MatLike"]] = None
+    current_window: int = 0
+    duplicates: int = 0
+
+    def emit() -> Iterator[Tuple[int, "cv2.typing.MatLike"]]:
+        nonlocal last_thumbnail, duplicates
+        _, frame_idx, frame, thumbnail = best
+        if last_thumbnail is not None and float(cv2.absdiff(thumbnail, last_thumbnail).mean()) < MIN_FRAME_DIFFERENCE:
+            duplicates += 1
+            return
+        last_thumbnail = thumbnail
+        yield frame_idx, frame
+
+    for frame_idx, frame in read_frames_sequential(video, candidates):
+        window: int = min(int(frame_idx / window_size), total_frames - 1)
+        if window != current_window and best is not None:
+            yield from emit()
+            best = None
+        current_window = window
+        sharpness, thumbnail = frame_scores(frame)
+        if best is None or sharpness > best[0]:
+            best = (sharpness, frame_idx, frame, thumbnail)
+    if best is not None:
+        yield from emit()
+    if duplicates:
+        print(f"Dropped {duplicates} near-duplicate frames")
+
+def choose_extraction_strategy(
+    frame_indices: List[int],
+    keyframe_interval: float,
+    keyframes: Optional[List[int]] = None,
+) -> str:
+    """
+    Estimate the frames decoded by each strategy and pick the cheaper one.
+    Sequential decodes everything up to the last target; seeking decodes from the keyframe
+    before each target, or on average half a keyframe interval when keyframes aren't known.
+    """
+    if not frame_indices:
+        return "sequential"
+    sequential_cost: float = max(frame_indices) + 1
+    if keyframes:
+        seeking_cost: float = sum(
+            target - keyframes[max(0, bisect.bisect_right(keyframes, target) - 1)] + 1
+            for target in frame_indices
+        )
+    else:
+        seeking_cost = len(frame_indices) * (keyframe_interval / 2 + 1)
+    return "seek" if seeking_cost < sequential_cost else "sequential"
+
 def extract_frames(
     video_path: str, 
     output_dir: str, 
     settings: VideoSettings, 
-    start_frame_number: int = 0
+    start_frame_number: int = 0,
+    strategy: str = "auto",
+    keyframe_interval: Optional[float] = None,
+    encode_options: EncodeOptions = DEFAULT_ENCODE_OPTIONS,
+    video_info: Optional["VideoInfo"] = None,
 ) -> int:
     """
     Extract frames from a video file based on the provided settings.
+    strategy is "sequential", "seek", or "auto" to pick by how sparse the targets are
+    relative to the keyframes in video_info, or to keyframe_interval (in frames,
+    estimated from fps when not given). "ffmpeg" decodes in an ffmpeg process instead
+    of OpenCV; sharp selection always decodes with OpenCV.
+    video_info from the video index replaces the container's frame count estimate.
     Returns the next frame number to use.
     """
     # Create output directory if it doesn't exist
@@ -26,12 +399,16 @@ def extract_frames(
     # Get the number of frames to extract from settings
     total_frames: int = settings["total_frames"]  # Now we can directly access it
     
-    # Open the video file
-    video: cv2.VideoCapture = cv2.VideoCapture(video_path)
+    # Open the video file, hardware decoding when the frames are downscaled anyway
+    video: cv2.VideoCapture = open_video(video_path, hardware_decode=settings.get("max_dimension", 0) > 0)
     
     # Get video properties
-    video_frames: int = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps: float = video.get(cv2.CAP_PROP_FPS)
+    if video_info is not None:
+        video_frames: int = video_info["frame_count"]
+        fps: float = video_info["fps"]
+    else:
+        video_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = video.get(cv2.CAP_PROP_FPS)
     duration: float = video_frames / fps if fps > 0 else 0
     
     # Calculate which frames to extract
@@ -45,29 +422,64 @@ def extract_frames(
         # Calculate frame indices to extract (evenly distributed)
         frame_indices: List[int] = [int(i * video_frames / total_frames) for i in range(total_frames)]
     
+    # ffmpeg crops and scales as it decodes, into reused buffers
+    buffers: Optional[FrameBufferPool] = None
+    if settings.get("selection", "even") == "sharp" and strategy == "ffmpeg":
+        strategy = "auto"
+    if strategy == "ffmpeg":
+        if video_info is not None:
+            width, height = video_info["width"], video_info["height"]
+        else:
+            width, height = int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        output_width, output_height = output_resolution(width, height, settings)
+        buffers = FrameBufferPool(output_width, output_height,
+                                  encode_options["queue_depth"] + encode_options["encoder_threads"] + 2)
+        frames: Iterator[Tuple[int, "cv2.typing.MatLike"]] = read_frames_ffmpeg(
+            video_path, frame_indices, width, height, settings, buffers)
+    elif strategy == "auto":
+        if keyframe_interval is None:
+            keyframe_interval = DEFAULT_KEYFRAME_INTERVAL_SECONDS * fps if fps > 0 else 1
+        keyframes: Optional[List[int]] = video_info["keyframes"] if video_info is not None else None
+        strategy = choose_extraction_strategy(frame_indices, keyframe_interval, keyframes)
+    if strategy != "ffmpeg":
+        read_frames = read_frames_seeking if strategy == "seek" else read_frames_sequential
+        frames = read_frames(video, frame_indices)
+    if settings.get("selection", "even") == "sharp":
+        strategy = "sharpest per window, sequential"
+        frames = read_frames_sharpest(video, video_frames, total_frames)
+    
     frame_number: int = start_frame_number
     extracted_count: int = 0
+    writer: FrameWriter = FrameWriter(encode_options)
     
-    for _, frame_idx in enumerate(frame_indices):
-        # Set video to the target frame
-        video.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-        success: bool
-        success, frame = video.read()
-        
-        if success:
-            frame_path: str = os.path.join(output_dir, f"frame_{frame_number:06d}.png")
-            # Use PNG for lossless quality
-            cv2.imwrite(frame_path, frame)
+    try:
+        for _, frame in frames:
+            if buffers is None:
+                frame = crop_and_downscale(frame, settings)
+            writer.write(frame_path(output_dir, frame_number, encode_options["image_format"]), frame,
+                         buffers.release if buffers is not None else None)
             frame_number += 1
             extracted_count += 1
+    finally:
+        writer.close()
     
     video.release()
-    print(f"Extracted {extracted_count} frames from {os.path.basename(video_path)}")
+    print(f"Extracted {extracted_count} frames from {os.path.basename(video_path)} ({strategy} decode)")
     print(f"Video duration: {duration:.2f} seconds, Original frames: {video_frames}")
     
     # Return the next frame number to use
     return frame_number
 
+def benchmark_extraction(video_path: str, total_frames: int) -> None:
+    """Time sequential decoding, per-frame seeking and ffmpeg if installed on one video, writing into a scratch folder."""
+    print(f"Benchmarking extraction of {total_frames} frames from {video_path}")
+    strategies: List[str] = ["seek", "sequential"] + (["ffmpeg"] if shutil.which("ffmpeg") else [])
+    for strategy in strategies:
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            start: float = time.perf_counter()
+            extract_frames(video_path, scratch_dir, {"total_frames": total_frames}, strategy=strategy)
+            print(f"  {strategy}: {time.perf_counter() - start:.2f} seconds")
+
 def load_settings(folder_path: str) -> Optional[VideoSettings]:
     """Load settings from settings.json in the folder if it exists, otherwise return default settings."""
     settings_path: str = os.path.join(folder_path, "settings.json")
@@ -162,60 +574,378 @@ def clean_output_folders(input_base_folder: str, output_base_folder: str) -> Non
     
     print(f"Cleaned {len(orphaned_folders)} orphaned output folders.")
 
+class Fingerprint(TypedDict):
+    size: int
+    mtime: float
+    sha256: Optional[str]
+
+class VideoRecord(TypedDict):
+    fingerprint: Fingerprint
+    settings: VideoSettings
+    first_frame: int
+    frame_count: int
+
+# Written next to the frames: which video produced which frame range, and from what source.
+# total_frames is the subfolder's frame budget the videos were allocated from
+class Manifest(TypedDict):
+    image_format: str
+    total_frames: int
+    videos: Dict[str, VideoRecord]
+
+MANIFEST_FILENAME: str = "manifest.json"
+
+def video_fingerprint(video_path: str, hash_contents: bool = False) -> Fingerprint:
+    """Size and modification time of a video, plus a SHA-256 of its contents when asked for."""
+    stat: os.stat_result = os.stat(video_path)
+    sha256: Optional[str] = None
+    if hash_contents:
+        digest = hashlib.sha256()
+        with open(video_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha256}
+
+def fingerprints_match(recorded: Fingerprint, current: Fingerprint) -> bool:
+    """Compare by content hash when both sides have one, so a touched but identical video still matches."""
+    if recorded["size"] != current["size"]:
+        return False
+    if recorded.get("sha256") and current["sha256"]:
+        return recorded["sha256"] == current["sha256"]
+    return recorded["mtime"] == current["mtime"]
+
+class VideoInfo(TypedDict):
+    fingerprint: Fingerprint
+    frame_count: int
+    fps: float
+    duration: float
+    width: int
+    height: int
+    # Frame numbers of keyframes, empty when the backend can't report them
+    keyframes: List[int]
+
+VIDEO_INDEX_FILENAME: str = ".video-index.json"
+
+def probe_video(video_path: str, fingerprint: Fingerprint) -> VideoInfo:
+    """
+    Count frames and find keyframes by reading the compressed packets without decoding them,
+    which is exact where CAP_PROP_FRAME_COUNT is only the container's estimate.
+    Falls back to that estimate when the backend can't hand out raw packets.
+    """
+    video: cv2.VideoCapture = cv2.VideoCapture(video_path)
+    fps: float = video.get(cv2.CAP_PROP_FPS)
+    width: int = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height: int = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count: int = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    video.release()
+    
+    keyframes: List[int] = []
+    if hasattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME"):
+        packets: cv2.VideoCapture = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+        if packets.isOpened():
+            packet_count: int = 0
+            while packets.grab():
+                if packets.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                    keyframes.append(packet_count)
+                packet_count += 1
+            if packet_count > 0:
+                frame_count = packet_count
+        packets.release()
+    
+    return {
+        "fingerprint": fingerprint,
+        "frame_count": frame_count,
+        "fps": fps,
+        "duration": frame_count / fps if fps > 0 else 0,
+        "width": width,
+        "height": height,
+        "keyframes": keyframes,
+    }
+
+class VideoIndex:
+    """
+    Probed metadata of every video under an input folder, kept in a file at its root and
+    keyed by path relative to it. Videos are only probed again when their fingerprint changes.
+    """
+    def __init__(self, input_base_folder: str, hash_videos: bool = False) -> None:
+        self.input_base_folder: str = input_base_folder
+        self.hash_videos: bool = hash_videos
+        self.path: str = os.path.join(input_base_folder, VIDEO_INDEX_FILENAME)
+        self.videos: Dict[str, VideoInfo] = {}
+        self.probed: int = 0
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    self.videos = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                print(f"Error reading video index {self.path}, probing every video again")
+    
+    def info(self, video_path: str) -> VideoInfo:
+        key: str = os.path.relpath(video_path, self.input_base_folder).replace(os.sep, "/")
+        fingerprint: Fingerprint = video_fingerprint(video_path, self.hash_videos)
+        cached: Optional[VideoInfo] = self.videos.get(key)
+        if cached is not None and fingerprints_match(cached["fingerprint"], fingerprint):
+            # Take on the current mtime and hash, so the next comparison uses them
+            cached["fingerprint"] = fingerprint
+            return cached
+        with pipeline_events.stage("probe_video", video=video_path, bytes_in=fingerprint["size"]):
+            video_info: VideoInfo = probe_video(video_path, fingerprint)
+        self.videos[key] = video_info
+        self.probed += 1
+        return video_info
+    
+    def save(self) -> None:
+        """Write the index, dropping videos that no longer exist."""
+        self.videos = {key: video_info for key, video_info in self.videos.items()
+                       if os.path.exists(os.path.join(self.input_base_folder, key))}
+        with open(self.path, 'w') as f:
+            json.dump(self.videos, f, indent=4)
+
+def load_manifest(output_subfolder_path: str) -> Optional[Manifest]:
+    """Load the manifest of a previous extraction, or None if there isn't a readable one."""
+    manifest_path: str = os.path.join(output_subfolder_path, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest: Manifest = json.load(f)
+        return manifest
+    except (json.JSONDecodeError, OSError):
+        print(f"Error reading manifest {manifest_path}, extracting everything again")
+        return None
+
+def save_manifest(output_subfolder_path: str, manifest: Manifest) -> None:
+    manifest_path: str = os.path.join(output_subfolder_path, MANIFEST_FILENAME)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+def without_allocation(settings: VideoSettings) -> Dict:
+    """A video's settings apart from total_frames, its share of the subfolder's budget."""
+    return {key: value for key, value in settings.items() if key != "total_frames"}
+
+def allocated_frames(task: "ExtractionTask") -> int:
+    """Frame numbers set aside for a video: its share of the budget, but never more frames than it has."""
+    return max(1, min(task["settings"]["total_frames"], task["video_info"]["frame_count"]))
+
 def should_process_subfolder(
-    input_subfolder_path: str, 
     output_subfolder_path: str, 
-    settings: VideoSettings,
-) -> bool:
+    tasks: List["ExtractionTask"],
+    total_frames: int,
+    image_format: str = "png",
+) -> Tuple[bool, Dict[str, VideoRecord]]:
     """
-    Determine if a subfolder should be processed by checking if output exists
-    and if settings have changed.
+    Compare the planned extraction against the manifest of the last one.
+    A video's frames can be kept when its fingerprint, its settings other than its share of the
+    frame budget, the subfolder's budget and the image format are unchanged, its share hasn't
+    grown and all of its frames are still there. Adding a video shrinks the other videos' shares,
+    which reuse_frames absorbs without extracting them again; removing or trimming one grows them,
+    and those videos are extracted again at their new share.
+    Returns whether anything has to change, and the records of the videos that can be kept.
     """
-    # If output folder doesn't exist, we should process
-    if not os.path.exists(output_subfolder_path):
-        return True
+    manifest: Optional[Manifest] = load_manifest(output_subfolder_path)
+    if manifest is None or manifest["image_format"] != image_format:
+        return True, {}
+    if manifest.get("total_frames") != total_frames:
+        print(f"Frame budget has changed to {total_frames}")
+        return True, {}
     
-    # Check if there are any frames in the output folder
-    output_files: List[str] = [f for f in os.listdir(output_subfolder_path) 
-                   if f.startswith("frame_") and f.endswith(".png")]
+    kept: Dict[str, VideoRecord] = {}
+    for task in tasks:
+        video_file: str = os.path.basename(task["video_path"])
+        record: Optional[VideoRecord] = manifest["videos"].get(video_file)
+        if record is None:
+            continue
+        if not fingerprints_match(record["fingerprint"], task["video_info"]["fingerprint"]):
+            print(f"Video has changed: {video_file}")
+            continue
+        if without_allocation(record["settings"]) != without_allocation(task["settings"]):
+            print(f"Settings have changed for {video_file}")
+            continue
+        if not all(os.path.exists(frame_path(output_subfolder_path, frame_number, image_format))
+                   for frame_number in range(record["first_frame"], record["first_frame"] + record["frame_count"])):
+            print(f"Frames are missing for {video_file}")
+            continue
+        # Frames for a smaller share can't be stretched to a bigger one
+        extracted_for: int = max(1, min(record["settings"]["total_frames"], task["video_info"]["frame_count"]))
+        if extracted_for < allocated_frames(task):
+            print(f"Share of the frame budget has grown for {video_file}")
+            continue
+        kept[video_file] = record
     
-    # If no frames, we should process
-    if not output_files:
-        return True
+    # Nothing to do if every video is kept and no video was removed
+    return len(kept) != len(tasks) or len(manifest["videos"]) != len(tasks), kept
+
+def reuse_frames(
+    output_subfolder_path: str,
+    tasks: List["ExtractionTask"],
+    kept: Dict[str, VideoRecord],
+    image_format: str = "png",
+) -> None:
+    """
+    Move the kept videos' frames to their planned start numbers and delete every other frame.
+    A kept video whose share of the budget shrank keeps an evenly spaced subset of its frames.
+    Records in kept are updated to the number of frames kept.
+    Kept frames go through temporary names first, so moves can't overwrite each other.
+    """
+    moves: List[Tuple[str, str]] = []
+    for task in tasks:
+        video_file: str = os.path.basename(task["video_path"])
+        record: Optional[VideoRecord] = kept.get(video_file)
+        if record is None:
+            continue
+        keep_count: int = min(record["frame_count"], allocated_frames(task))
+        offsets: List[int] = [int(i * record["frame_count"] / keep_count) for i in range(keep_count)]
+        for new_offset, offset in enumerate(offsets):
+            source: str = frame_path(output_subfolder_path, record["first_frame"] + offset, image_format)
+            temporary: str = source + ".keep"
+            os.rename(source, temporary)
+            moves.append((temporary, frame_path(output_subfolder_path, task["start_frame_number"] + new_offset, image_format)))
+        kept[video_file] = dict(record, frame_count=keep_count)
     
-    # Check if settings have changed by looking for a settings record
-    settings_record_path: str = os.path.join(output_subfolder_path, "settings.json")
-    if not os.path.exists(settings_record_path):
-        return True
+    # Clear frames of changed or removed videos, in any format
+    for file in os.listdir(output_subfolder_path):
+        if any(is_frame_file(file, other_format) for other_format in IMAGE_EXTENSIONS):
+            os.remove(os.path.join(output_subfolder_path, file))
     
-    # Compare current settings with recorded settings
-    try:
-        with open(settings_record_path, 'r') as f:
-            recorded_settings: VideoSettings = json.load(f)
-        
-        # If settings are different, we should process
-        if recorded_settings != settings:
-            print(f"Settings have changed for {os.path.basename(input_subfolder_path)}")
-            return True
-    except:
-        return True
-    
-    # If we got here, output exists and settings haven't changed
-    return False
-
-def save_settings_record(output_subfolder_path: str, settings: VideoSettings) -> None:
-    """Save a record of the settings used for processing."""
+    for temporary, destination in moves:
+        os.rename(temporary, destination)
+    if kept:
+        print(f"Keeping frames of {len(kept)} unchanged videos")
+
+def save_settings_record(
+    output_subfolder_path: str,
+    settings: VideoSettings,
+    output_resolutions: Optional[Dict[str, List[int]]] = None,
+) -> None:
+    """Save a record of the settings used for processing, with the [width, height] of each video's frames."""
     settings_record_path: str = os.path.join(output_subfolder_path, "settings.json")
+    record: Dict = dict(settings)
+    if output_resolutions is not None:
+        record["output_resolutions"] = output_resolutions
     with open(settings_record_path, 'w') as f:
-        json.dump(settings, f, indent=4)
+        json.dump(record, f, indent=4)
+
+class ExtractionTask(TypedDict):
+    subfolder: str
+    video_path: str
+    output_dir: str
+    settings: VideoSettings
+    start_frame_number: int
+    encode_options: EncodeOptions
+    video_info: VideoInfo
+    # "auto", or "ffmpeg" to decode in an ffmpeg process
+    strategy: str
+
+def run_extraction_task(task: ExtractionTask) -> int:
+    """Extract one video's frames; returns how many were written. Runs inside pool workers."""
+    with pipeline_events.stage("extract_frames", subfolder=task["subfolder"], video=task["video_path"]) as event:
+        event["bytes_in"] = task["video_info"]["fingerprint"]["size"]
+        next_frame_number: int = extract_frames(
+            task["video_path"],
+            task["output_dir"],
+            task["settings"],
+            start_frame_number=task["start_frame_number"],
+            encode_options=task["encode_options"],
+            strategy=task["strategy"],
+            video_info=task["video_info"],
+        )
+        event["frames"] = next_frame_number - task["start_frame_number"]
+        if pipeline_events.enabled():
+            event["bytes_out"] = sum(
+                pipeline_events.path_bytes(frame_path(task["output_dir"], frame_number, task["encode_options"]["image_format"]))
+                for frame_number in range(task["start_frame_number"], next_frame_number))
+    return next_frame_number - task["start_frame_number"]
+
+def renumber_frames(output_subfolder_path: str, image_format: str = "png") -> int:
+    """
+    Close gaps left by frames that failed to decode, keeping their order.
+    Renaming in ascending order never overwrites a frame that hasn't moved yet.
+    Returns the number of frames.
+    """
+    frame_files: List[str] = sorted(f for f in os.listdir(output_subfolder_path)
+                                    if is_frame_file(f, image_format))
+    for frame_number, frame_file in enumerate(frame_files):
+        frame_name: str = f"frame_{frame_number:06d}{IMAGE_EXTENSIONS[image_format]}"
+        if frame_file != frame_name:
+            os.rename(os.path.join(output_subfolder_path, frame_file),
+                      os.path.join(output_subfolder_path, frame_name))
+    return len(frame_files)
+
+def plan_subfolder(
+    subfolder: str,
+    input_subfolder_path: str,
+    output_subfolder_path: str,
+    settings: VideoSettings,
+    video_index: VideoIndex,
+    encode_options: EncodeOptions = DEFAULT_ENCODE_OPTIONS,
+    strategy: str = "auto",
+) -> List[ExtractionTask]:
+    """
+    Allocate the subfolder's frame budget across its videos by duration, as recorded in the video index.
+    Start frame numbers come from the allocation rather than from earlier extractions,
+    so videos can be extracted in any order and still number the same way.
+    """
+    # Get all video files in the subfolder
+    video_files: List[str] = sorted(f for f in os.listdir(input_subfolder_path) 
+                      if is_video_file(f) and 
+                      os.path.isfile(os.path.join(input_subfolder_path, f)))
+    
+    if not video_files:
+        print(f"No video files found in {input_subfolder_path}")
+        return []
+    
+    print(f"Found {len(video_files)} video files in {subfolder}")
+    
+    # First, calculate the total duration of all videos
+    video_infos: List[VideoInfo] = [video_index.info(os.path.join(input_subfolder_path, video_file))
+                                    for video_file in video_files]
+    video_durations: List[float] = [video_info["duration"] for video_info in video_infos]
+    total_duration: float = sum(video_durations)
+    
+    tasks: List[ExtractionTask] = []
+    next_frame_number: int = 0
+    for i, video_file in enumerate(video_files):
+        # Calculate frames for this video based on its duration ratio
+        per_video_settings = settings.copy()
+        if total_duration > 0:
+            duration_ratio = video_durations[i] / total_duration
+            print(f'{video_file} duration: {video_durations[i]:.2f} seconds ({duration_ratio:.2%} of total)')
+            frames_for_video = max(1, int(settings['total_frames'] * duration_ratio))
+        else:
+            # Fallback if durations couldn't be calculated
+            frames_for_video = max(1, settings['total_frames'] // len(video_files))
+            
+        per_video_settings['total_frames'] = frames_for_video
+        
+        print(f'Frames allocated for {video_file}: {frames_for_video}, starting at frame number {next_frame_number}')
+        tasks.append({
+            "subfolder": subfolder,
+            "video_path": os.path.join(input_subfolder_path, video_file),
+            "output_dir": output_subfolder_path,
+            "settings": per_video_settings,
+            "start_frame_number": next_frame_number,
+            "encode_options": encode_options,
+            "strategy": strategy,
+            "video_info": video_infos[i],
+        })
+        next_frame_number += allocated_frames(tasks[-1])
+    return tasks
 
 def process_video_folders(
     input_base_folder: str, 
     output_base_folder: str, 
     default_settings: Optional[VideoSettings] = None, 
-    clean: bool = False
+    clean: bool = False,
+    jobs: int = 1,
+    encode_options: EncodeOptions = DEFAULT_ENCODE_OPTIONS,
+    hash_videos: bool = False,
+    strategy: str = "auto",
 ) -> None:
-    """Process all video folders, extracting frames from videos based on folder settings."""
+    """
+    Process all video folders, extracting frames from videos based on folder settings.
+    Only videos that changed since the last run are extracted again; see should_process_subfolder.
+    With jobs > 1, every video of every subfolder is extracted in a pool of that many processes.
+    """
     # Set default settings if none provided
     if default_settings is None:
         default_settings = {"total_frames": 30}
@@ -241,7 +971,45 @@ def process_video_folders(
     
     print(f"Found {len(subfolders)} subfolders to process")
     
-    # Process each subfolder
+    # Plan every subfolder first, then extract all of their videos together
+    video_index: VideoIndex = VideoIndex(input_base_folder, hash_videos)
+    tasks: List[ExtractionTask] = []
+    subfolder_settings: Dict[str, VideoSettings] = {}
+    subfolder_plans: Dict[str, List[ExtractionTask]] = {}
+    # Frames each video ended up with, filled in as extractions finish
+    video_frame_counts: Dict[str, Dict[str, int]] = {}
+    remaining_videos: Dict[str, int] = {}
+    
+    def finish_subfolder(subfolder: str) -> None:
+        output_subfolder_path: str = os.path.join(output_base_folder, subfolder)
+        with pipeline_events.stage("renumber_frames", subfolder=subfolder):
+            frame_count: int = renumber_frames(output_subfolder_path, encode_options["image_format"])
+        # Frames are in video order, so after renumbering each video's range follows the previous one
+        videos: Dict[str, VideoRecord] = {}
+        output_resolutions: Dict[str, List[int]] = {}
+        first_frame: int = 0
+        for task in subfolder_plans[subfolder]:
+            video_file: str = os.path.basename(task["video_path"])
+            output_resolutions[video_file] = list(output_resolution(
+                task["video_info"]["width"], task["video_info"]["height"], task["settings"]))
+            count: int = video_frame_counts[subfolder][video_file]
+            videos[video_file] = {
+                "fingerprint": task["video_info"]["fingerprint"],
+                "settings": task["settings"],
+                "first_frame": first_frame,
+                "frame_count": count,
+            }
+            first_frame += count
+        save_manifest(output_subfolder_path, {
+            "image_format": encode_options["image_format"],
+            "total_frames": subfolder_settings[subfolder]["total_frames"],
+            "videos": videos,
+        })
+        # Save a record of the settings used
+        save_settings_record(output_subfolder_path, subfolder_settings[subfolder], output_resolutions)
+        print(f"Completed processing subfolder: {subfolder}")
+        print(f"Total frames extracted: {frame_count}")
+    
     for subfolder in subfolders:
         input_subfolder_path: str = os.path.join(input_base_folder, subfolder)
         output_subfolder_path: str = os.path.join(output_base_folder, subfolder)
@@ -254,85 +1022,77 @@ def process_video_folders(
         print(f"Processing subfolder: {subfolder}")
         print(f"Using settings: {settings}")
         
+        plan: List[ExtractionTask] = plan_subfolder(subfolder, input_subfolder_path, output_subfolder_path, settings, video_index, encode_options, strategy)
+        if not plan:
+            continue
+        
+        # Check the crop against each video's resolution before decoding anything
+        try:
+            for task in plan:
+                if task["video_info"]["width"] > 0 and task["video_info"]["height"] > 0:
+                    output_resolution(task["video_info"]["width"], task["video_info"]["height"], settings)
+        except ValueError as e:
+            print(f"Error: skipping {subfolder} - {os.path.basename(task['video_path'])}: {e}")
+            continue
+        
         # Check if we need to process this subfolder
-        if not should_process_subfolder(input_subfolder_path, output_subfolder_path, settings):
-            print(f"Skipping {subfolder} - output already exists with same settings")
+        changed, kept = should_process_subfolder(output_subfolder_path, plan, settings["total_frames"], encode_options["image_format"])
+        if not changed:
+            print(f"Skipping {subfolder} - all {len(plan)} videos unchanged")
             continue
         
-        # If output folder exists but we're reprocessing, clear it first
         if os.path.exists(output_subfolder_path):
-            print(f"Clearing existing output folder: {output_subfolder_path}")
-            for file in os.listdir(output_subfolder_path):
-                file_path: str = os.path.join(output_subfolder_path, file)
-                if os.path.isfile(file_path):
-                    os.remove(file_path)
+            with pipeline_events.stage("reuse_frames", subfolder=subfolder, kept_videos=len(kept)):
+                reuse_frames(output_subfolder_path, plan, kept, encode_options["image_format"])
         else:
             # Create output subfolder if it doesn't exist
             os.makedirs(output_subfolder_path)
         
-        # Get all video files in the subfolder
-        video_files: List[str] = [f for f in os.listdir(input_subfolder_path) 
-                      if is_video_file(f) and 
-                      os.path.isfile(os.path.join(input_subfolder_path, f))]
-        
-        if not video_files:
-            print(f"No video files found in {input_subfolder_path}")
-            continue
-        
-        print(f"Found {len(video_files)} video files in {subfolder}")
-        
-        # First, calculate the total duration of all videos
-        total_duration: float = 0.0
-        video_durations: List[float] = []
-        
-        for video_file in video_files:
-            video_path: str = os.path.join(input_subfolder_path, video_file)
-            video: cv2.VideoCapture = cv2.VideoCapture(video_path)
-            
-            # Get video properties
-            video_frames: int = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps: float = video.get(cv2.CAP_PROP_FPS)
-            duration: float = video_frames / fps if fps > 0 else 0
-            
-            video_durations.append(duration)
-            total_duration += duration
-            video.release()
-        
-        # Process each video in the subfolder
-        next_frame_number: int = 0
-        for i, video_file in enumerate(video_files):
-            video_path: str = os.path.join(input_subfolder_path, video_file)
-            
-            print(f"Processing: {video_file} -> {output_subfolder_path}")
-            print(f"Starting at frame number: {next_frame_number}")
-
-            # Calculate frames for this video based on its duration ratio
-            per_video_settings = settings.copy()
-            if total_duration > 0:
-                duration_ratio = video_durations[i] / total_duration
-                print(f'Video duration: {video_durations[i]:.2f} seconds ({duration_ratio:.2%} of total)')
-                frames_for_video = max(1, int(settings['total_frames'] * duration_ratio))
-            else:
-                # Fallback if durations couldn't be calculated
-                frames_for_video = max(1, settings['total_frames'] // len(video_files))
-                
-            per_video_settings['total_frames'] = frames_for_video
-            
-            print(f'Frames allocated for this video: {per_video_settings["total_frames"]}')
-            
-            # Extract frames using the settings, and get the next frame number
-            next_frame_number = extract_frames(
-                video_path, 
-                output_subfolder_path, 
-                per_video_settings, 
-                start_frame_number=next_frame_number
-            )
-        
-        # Save a record of the settings used
-        save_settings_record(output_subfolder_path, settings)
-        
-        print(f"Completed processing subfolder: {subfolder}")
-        print(f"Total frames extracted: {next_frame_number}")
+        subfolder_settings[subfolder] = settings
+        subfolder_plans[subfolder] = plan
+        video_frame_counts[subfolder] = {video_file: record["frame_count"] for video_file, record in kept.items()}
+        subfolder_tasks: List[ExtractionTask] = [task for task in plan if os.path.basename(task["video_path"]) not in kept]
+        remaining_videos[subfolder] = len(subfolder_tasks)
+        if subfolder_tasks:
+            tasks.extend(subfolder_tasks)
+        else:
+            # Only removed videos, nothing to extract
+            finish_subfolder(subfolder)
+    
+    video_index.save()
+    print(f"Probed {video_index.probed} new or changed videos for the video index")
+    
+    if not tasks:
+        return
+    
+    extracting_subfolders: int = sum(1 for count in remaining_videos.values() if count > 0)
+    print(f"Extracting {len(tasks)} videos from {extracting_subfolders} subfolders with {jobs} worker(s)")
+    start: float = time.perf_counter()
+    total_extracted: int = 0
+    
+    def finish_task(task: ExtractionTask, extracted_count: int, done: int) -> None:
+        nonlocal total_extracted
+        subfolder: str = task["subfolder"]
+        total_extracted += extracted_count
+        video_frame_counts[subfolder][os.path.basename(task["video_path"])] = extracted_count
+        remaining_videos[subfolder] -= 1
+        print(f"[{done}/{len(tasks)}] {subfolder}/{os.path.basename(task['video_path'])}: {extracted_count} frames")
+        if remaining_videos[subfolder] == 0:
+            finish_subfolder(subfolder)
+    
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures: Dict[Future, ExtractionTask] = {executor.submit(run_extraction_task, task): task for task in tasks}
+            for done, future in enumerate(as_completed(futures), 1):
+                finish_task(futures[future], future.result(), done)
+    else:
+        for done, task in enumerate(tasks, 1):
+            print(f"Processing: {os.path.basename(task['video_path'])} -> {task['output_dir']}")
+            finish_task(task, run_extraction_task(task), done)
+    
+    elapsed: float = time.perf_counter() - start
+    print(f"Extracted {total_extracted} frames from {len(tasks)} videos in {extracting_subfolders} subfolders "
+          f"in {elapsed:.2f} seconds ({total_extracted / elapsed if elapsed > 0 else 0:.1f} frames/s)")
 
 def parse_arguments() -> argparse.Namespace:
     """Parse command line arguments."""
@@ -349,23 +1109,89 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument('--frames', '-f', type=int, default=180,
                         help='Default number of frames to extract per subfolder')
     
+    parser.add_argument('--selection', type=str, default="even", choices=["even", "sharp"],
+                        help='Default frame selection for new settings files: evenly spaced, or the sharpest '
+                             'non-duplicate frame of each time window')
+    
+    parser.add_argument('--max-dimension', type=int, default=0,
+                        help='Default for new settings files: downscale frames so their longer side is at most this '
+                             'many pixels, 0 keeps the source resolution')
+    
+    parser.add_argument('--crop', type=int, nargs=4, metavar=('X', 'Y', 'WIDTH', 'HEIGHT'),
+                        help='Default for new settings files: crop frames to this rectangle in source pixels before downscaling')
+    
     parser.add_argument('--clean', action='store_true',
                         help='Remove output folders that don\'t have corresponding input subfolders')
     
-    return parser.parse_args()
+    parser.add_argument('--hash-videos', action='store_true',
+                        help='Also fingerprint videos by a hash of their contents, so touched but identical videos are not extracted again')
+    
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Number of worker processes extracting videos in parallel')
+    
+    parser.add_argument('--format', type=str, default=DEFAULT_ENCODE_OPTIONS["image_format"], choices=sorted(IMAGE_EXTENSIONS),
+                        help='Image format for extracted frames: lossless png/webp/tiff, or high quality jpg')
+    
+    parser.add_argument('--png-compression', type=int, default=DEFAULT_ENCODE_OPTIONS["png_compression"], choices=range(10),
+                        metavar='0-9', help='PNG compression level, lower is faster to write and larger on disk')
+    
+    parser.add_argument('--encoder-threads', type=int, default=DEFAULT_ENCODE_OPTIONS["encoder_threads"],
+                        help='Threads encoding frames while the next ones decode')
+    
+    parser.add_argument('--queue-depth', type=int, default=DEFAULT_ENCODE_OPTIONS["queue_depth"],
+                        help='Decoded frames allowed to wait for an encoder thread')
+    
+    parser.add_argument('--decoder', type=str, default="opencv", choices=["opencv", "ffmpeg"],
+                        help='Decode with OpenCV, or with one ffmpeg process per video that outputs only the '
+                             'selected frames (exact on variable frame rate footage, needs ffmpeg on the path)')
+    
+    pipeline_events.add_arguments(parser)
+    
+    parser.add_argument('--benchmark-extraction', type=str, nargs='?', metavar='VIDEO',
+                        const=os.path.join("raw_videos", "barren-patch", "barren-patch.mp4"),
+                        help='Time sequential against seeking extraction on VIDEO (default raw_videos/barren-patch) and exit')
+    
+    args: argparse.Namespace = parser.parse_args()
+    if args.crop and (args.crop[0] < 0 or args.crop[1] < 0 or args.crop[2] <= 0 or args.crop[3] <= 0):
+        parser.error("--crop needs X and Y of 0 or more and a WIDTH and HEIGHT above 0")
+    return args
 
 def main() -> None:
     """Main function to run the script."""
     # Parse command line arguments
     args: argparse.Namespace = parse_arguments()
     
+    if args.benchmark_extraction:
+        benchmark_extraction(args.benchmark_extraction, args.frames)
+        return
+    
     # Define default settings
     default_settings: VideoSettings = {
         "total_frames": args.frames,
     }
+    if args.selection != "even":
+        default_settings["selection"] = args.selection
+    if args.crop:
+        default_settings["crop"] = args.crop
+    if args.max_dimension > 0:
+        default_settings["max_dimension"] = args.max_dimension
+    encode_options: EncodeOptions = {
+        "image_format": args.format,
+        "png_compression": args.png_compression,
+        "encoder_threads": args.encoder_threads,
+        "queue_depth": args.queue_depth,
+    }
     
     # Process all video subfolders
-    process_video_folders(args.input, args.output, default_settings, args.clean)
+    if args.decoder == "ffmpeg" and shutil.which("ffmpeg") is None:
+        print("Error: FFmpeg not found. Install it or use --decoder opencv.")
+        return
+    strategy: str = "ffmpeg" if args.decoder == "ffmpeg" else "auto"
+    
+    pipeline_events.configure(args.event_log, args.trace)
+    with pipeline_events.stage("process_video_folders", input=args.input, output=args.output, jobs=args.jobs):
+        process_video_folders(args.input, args.output, default_settings, args.clean, args.jobs, encode_options, args.hash_videos, strategy)
+    pipeline_events.finish()
 
 if __name__ == "__main__":
     main()
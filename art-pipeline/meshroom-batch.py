@@ -1,7 +1,10 @@
+import argparse
 import os
 import subprocess
 import sys
 
+import pipeline_events
+
 # --- Configuration ---
 
 # Path to the Meshroom batch executable
@@ -78,20 +81,16 @@ def run_meshroom_for_subfolder(
     print(f"  Running command: {' '.join(cmd)}")
 
     try:
-        # Execute the command
-        # Run from the directory containing the executable for potentially
-        # better relative path resolution *within* Meshroom if needed,
-        # although absolute paths in args should be sufficient.
-        process = subprocess.run(
+        # Execute the command, showing Meshroom's output as it runs rather than after hours of silence
+        pipeline_events.run(
+            "meshroom",
             cmd,
+            inputs=[abs_input_subfolder_path],
+            outputs=[abs_output_subfolder_path],
+            stream_output=True,
             check=True, # Raise an exception if Meshroom returns an error
-            capture_output=True, # Capture stdout and stderr
-            text=True, # Decode stdout/stderr as text
-            # cwd=os.path.dirname(abs_meshroom_batch_exe) # Optional: Set working directory
+            subfolder=subfolder_name,
         )
-        print(f"  Meshroom STDOUT:\n{process.stdout}")
-        if process.stderr:
-            print(f"  Meshroom STDERR:\n{process.stderr}")
         print(f"--- Finished Subfolder: {subfolder_name} ---")
         return True
 
@@ -99,8 +98,9 @@ def run_meshroom_for_subfolder(
         print(f"!!! Error processing {subfolder_name} !!!", file=sys.stderr)
         print(f"  Return Code: {e.returncode}", file=sys.stderr)
         print(f"  Command: {' '.join(e.cmd)}", file=sys.stderr)
-        print(f"  Stdout:\n{e.stdout}", file=sys.stderr)
-        print(f"  Stderr:\n{e.stderr}", file=sys.stderr)
+        # The output was already shown as it came, repeat the end of it next to the error
+        output_tail = "".join(e.stdout.splitlines(keepends=True)[-20:]) if e.stdout else ""
+        print(f"  Last output:\n{output_tail}", file=sys.stderr)
         return False
     except FileNotFoundError:
         print(f"!!! Error: Meshroom executable not found at '{abs_meshroom_batch_exe}'", file=sys.stderr)
@@ -113,6 +113,11 @@ def run_meshroom_for_subfolder(
 # --- Keep the main() function as it was before ---
 def main():
     """Main function to find subfolders and process them."""
+    parser = argparse.ArgumentParser(description="Run Meshroom on every subfolder of extracted frames.")
+    pipeline_events.add_arguments(parser)
+    args = parser.parse_args()
+    pipeline_events.configure(args.event_log, args.trace)
+
     print("Starting Meshroom Batch Processing Script")
     print("=" * 40)
 
@@ -180,6 +185,7 @@ def main():
     print(f"  Successfully processed: {success_count}")
     print(f"  Failed to process:    {fail_count}")
     print("=" * 40)
+    pipeline_events.finish()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,184 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# Shared timing for the art pipeline scripts. Every stage and subprocess call is appended to a
+# JSON lines file as one event, eg.
+#   {"run": "...", "script": "meshroom-batch", "stage": "meshroom", "start": 1760000000.1,
+#    "seconds": 5423.2, "status": "ok", "exit_code": 0, "bytes_in": 812345678, "bytes_out": 23456789, ...}
+# Recording is off until configure() is called. The settings are passed on through environment
+# variables, so pool workers and child scripts write into the same log under the same run id.
+
+EVENT_LOG_ENV: str = "ART_PIPELINE_EVENT_LOG"
+RUN_ID_ENV: str = "ART_PIPELINE_RUN_ID"
+
+_lock: threading.Lock = threading.Lock()
+_script: str = os.path.splitext(os.path.basename(sys.argv[0]))[0] if sys.argv and sys.argv[0] else "python"
+_trace_path: Optional[str] = None
+# Lines of streamed output kept for error messages
+STREAM_TAIL_LINES: int = 200
+
+def configure(event_log_path: Optional[str], trace_path: Optional[str] = None) -> None:
+    """Start recording to event_log_path for this process and the processes it starts."""
+    if event_log_path:
+        os.environ[EVENT_LOG_ENV] = os.path.abspath(event_log_path)
+        os.environ.setdefault(RUN_ID_ENV, uuid.uuid4().hex[:12])
+    global _trace_path
+    _trace_path = trace_path
+
+def enabled() -> bool:
+    return bool(os.environ.get(EVENT_LOG_ENV))
+
+def path_bytes(path: str) -> int:
+    """Size of a file, or of everything under a folder, 0 if it doesn't exist."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total: int = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                pass
+    return total
+
+def record(event: Dict[str, Any]) -> None:
+    """Append one event, filling in the run, script, process and thread."""
+    event_log_path: Optional[str] = os.environ.get(EVENT_LOG_ENV)
+    if not event_log_path:
+        return
+    event = {
+        "run": os.environ.get(RUN_ID_ENV),
+        "script": _script,
+        "pid": os.getpid(),
+        "thread": threading.current_thread().name,
+        **event,
+    }
+    line: str = json.dumps(event, default=str) + "\n"
+    with _lock:
+        # One write per line in append mode, so lines from several processes don't interleave
+        with open(event_log_path, 'a') as f:
+            f.write(line)
+
+@contextmanager
+def stage(name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Time the enclosed block as one event. The yielded dict is recorded with it, so the block can
+    add bytes_in, bytes_out or anything else it learns. An exception marks the event as an error.
+    """
+    event: Dict[str, Any] = {"stage": name, **fields}
+    start: float = time.time()
+    start_counter: float = time.perf_counter()
+    try:
+        yield event
+        event.setdefault("status", "ok")
+    except BaseException as e:
+        event["status"] = "error"
+        event["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        event["start"] = start
+        event["seconds"] = time.perf_counter() - start_counter
+        record(event)
+
+def run(
+    name: str,
+    cmd: Sequence[str],
+    inputs: Sequence[str] = (),
+    outputs: Sequence[str] = (),
+    stream_output: bool = False,
+    check: bool = False,
+    text: bool = True,
+    **fields: Any,
+) -> subprocess.CompletedProcess:
+    """
+    subprocess.run with the call recorded as an event, including its exit code and the bytes of
+    the inputs and outputs paths. Output is captured like capture_output=True, as bytes if not text,
+    or with stream_output printed line by line as it arrives (stderr merged into stdout) and only the
+    last STREAM_TAIL_LINES lines kept. Text that isn't valid UTF-8 is decoded with replacement characters.
+    The paths are only measured when recording is on.
+    """
+    with stage(name, command=" ".join(cmd), **fields) as event:
+        if enabled():
+            event["bytes_in"] = sum(path_bytes(path) for path in inputs)
+        if stream_output:
+            tail: deque = deque(maxlen=STREAM_TAIL_LINES)
+            process: subprocess.Popen = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace", bufsize=1)
+            for line in process.stdout:
+                print(line, end="", flush=True)
+                tail.append(line)
+            returncode: int = process.wait()
+            result: subprocess.CompletedProcess = subprocess.CompletedProcess(cmd, returncode, "".join(tail), "")
+        else:
+            result = subprocess.run(cmd, capture_output=True, text=text, errors="replace" if text else None, check=False)
+            if not text:
+                event["bytes_out"] = len(result.stdout)
+        event["exit_code"] = result.returncode
+        if outputs and enabled():
+            event["bytes_out"] = sum(path_bytes(path) for path in outputs)
+        event.setdefault("bytes_out", 0)
+        if result.returncode != 0:
+            event["status"] = "failed"
+    if check and result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+    return result
+
+def load_events(event_log_path: str, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Read back an event log, only one run's events if run_id is given."""
+    events: List[Dict[str, Any]] = []
+    with open(event_log_path, 'r') as f:
+        for line in f:
+            if line.strip():
+                event: Dict[str, Any] = json.loads(line)
+                if run_id is None or event.get("run") == run_id:
+                    events.append(event)
+    return events
+
+def write_chrome_trace(events: List[Dict[str, Any]], trace_path: str) -> None:
+    """Write events in the Chrome trace format, for chrome://tracing or ui.perfetto.dev."""
+    trace_events: List[Dict[str, Any]] = []
+    # Chrome wants numeric thread ids, so number the (pid, thread name) pairs and name them
+    thread_ids: Dict[tuple, int] = {}
+    for event in events:
+        key: tuple = (event["pid"], event["thread"])
+        if key not in thread_ids:
+            thread_ids[key] = len(thread_ids) + 1
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": event["pid"], "tid": thread_ids[key],
+                                 "args": {"name": f"{event.get('script', '')} {event['thread']}"}})
+        args: Dict[str, Any] = {key: value for key, value in event.items()
+                                if key not in ("stage", "start", "seconds", "pid", "thread")}
+        trace_events.append({
+            "name": event["stage"],
+            "cat": event.get("script", ""),
+            "ph": "X",
+            "ts": event["start"] * 1e6,
+            "dur": event["seconds"] * 1e6,
+            "pid": event["pid"],
+            "tid": thread_ids[(event["pid"], event["thread"])],
+            "args": args,
+        })
+    with open(trace_path, 'w') as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+
+def finish() -> None:
+    """Write the Chrome trace of this run, if configure() asked for one."""
+    event_log_path: Optional[str] = os.environ.get(EVENT_LOG_ENV)
+    if _trace_path and event_log_path and os.path.exists(event_log_path):
+        events: List[Dict[str, Any]] = load_events(event_log_path, os.environ.get(RUN_ID_ENV))
+        write_chrome_trace(events, _trace_path)
+        print(f"Wrote {len(events)} events to {_trace_path}")
+
+def add_arguments(parser: Any) -> None:
+    """The --event-log and --trace options every pipeline script takes."""
+    parser.add_argument('--event-log', type=str, metavar='PATH',
+                        help='Append a JSON line per stage and subprocess call (timing, bytes, exit status) to PATH')
+    parser.add_argument('--trace', type=str, metavar='PATH',
+                        help='With --event-log, also write this run as a Chrome trace to PATH')
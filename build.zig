@@ -7,6 +7,8 @@ const ExportMeshes = struct {
     const BlendExport = struct {
         script_path: []const u8,
         blend_paths: []const []const u8,
+        /// Passed to the script after "--", eg. `&.{"--binary"}`
+        script_args: []const []const u8 = &.{},
     };
     allocator: std.mem.Allocator,
     blend_exports: []const BlendExport,
@@ -40,6 +42,7 @@ const ExportMeshes = struct {
                 var man = b.graph.cache.obtain();
                 defer man.deinit();
                 _ = try man.addFile(full_path, null);
+                man.hash.addListOfBytes(blend_export.script_args);
                 if (try step.cacheHit(&man)) {
                     _ = man.final();
                     continue;
@@ -47,18 +50,30 @@ const ExportMeshes = struct {
 
                 print("Working on {s}", .{blend_path});
                 var timer = try std.time.Timer.start();
-                const res = try std.process.Child.run(.{
-                    .allocator = self.allocator,
-                    .cwd = try std.process.getCwdAlloc(self.allocator),
-                    .argv = &[_][]const u8{
+                const argv = try std.mem.concat(self.allocator, []const u8, &.{
+                    &.{
                         "blender",
                         full_path,
                         "--background",
+                        // Otherwise Blender exits 0 even when the script raises
+                        "--python-exit-code",
+                        "1",
                         "--python",
                         std.fmt.allocPrint(self.allocator, "{s}/{s}.py", .{ embed_content_dir, blend_export.script_path }) catch unreachable,
+                        "--",
                     },
+                    blend_export.script_args,
+                });
+                const res = try std.process.Child.run(.{
+                    .allocator = self.allocator,
+                    .cwd = try std.process.getCwdAlloc(self.allocator),
+                    .argv = argv,
                 });
                 print("stdout: {s}\n", .{res.stdout});
+                if (res.term != .Exited or res.term.Exited != 0) {
+                    print("stderr: {s}\n", .{res.stderr});
+                    return error.ExportFailed;
+                }
                 if (res.stderr.len > 0) {
                     print("stderr: {s}\n", .{res.stderr});
                     return error.ExportFailed;
@@ -439,36 +439,47 @@ pub const graph_nodes = struct {
                     .subdiv => |subdiv_mesh| {
                         const faces = subdiv_mesh.base_faces;
                         const positions = try arena.dupe(Vec4, subdiv_mesh.base_positions);
-                        for (subdiv_mesh.base_bone_indices, positions) |i, *position| {
-                            const bone_index: usize = @intCast(i);
-                            const bone = subdiv_mesh.armature.bones[bone_index];
-                            const animation = subdiv_mesh.armature.animation;
+                        // Rest-to-posed transform per bone, shared by every vertex it deforms
+                        const armature = subdiv_mesh.armature;
+                        const bone_matrices = try arena.alloc(zmath.Mat, armature.bones.len);
+                        for (armature.bones, bone_matrices, 0..) |bone, *bone_matrix, bone_index| {
                             const fps = 12;
-                            const inter_frame = props.timing.seconds_since_start * fps;
-                            const frame: usize = @intFromFloat(inter_frame);
-                            const animated_bone = .{
-                                animation[frame % animation.len].bones[bone_index],
-                                animation[(frame + 1) % animation.len].bones[bone_index],
-                            };
-                            const lerp = inter_frame - @as(f32, @floatFromInt(frame));
-                            position.* = zmath.mul(
-                                zmath.mul(
-                                    position.*,
-                                    zmath.inverse(
-                                        vec_math.translationRotationScaleToMatrix(
-                                            bone.rest.position,
-                                            bone.rest.rotation,
-                                            bone.rest.scale,
-                                        ),
+                            const animated_bone = armature.sampleBone(bone_index, props.timing.seconds_since_start * fps);
+                            bone_matrix.* = zmath.mul(
+                                zmath.inverse(
+                                    vec_math.translationRotationScaleToMatrix(
+                                        bone.rest.position,
+                                        bone.rest.rotation,
+                                        bone.rest.scale,
                                     ),
                                 ),
                                 vec_math.translationRotationScaleToMatrix(
-                                    zmath.lerp(animated_bone[0].position, animated_bone[1].position, lerp),
-                                    zmath.slerp(animated_bone[0].rotation, animated_bone[1].rotation, lerp),
-                                    zmath.lerp(animated_bone[0].scale, animated_bone[1].scale, lerp),
+                                    animated_bone.position,
+                                    animated_bone.rotation,
+                                    animated_bone.scale,
                                 ),
                             );
                         }
+                        if (subdiv_mesh.base_skin) |skin| {
+                            for (skin, subdiv_mesh.base_bone_indices, positions) |influence, heaviest_bone, *position| {
+                                var skinned = Vec4{ 0, 0, 0, 0 };
+                                for (influence.bone_indices, influence.weights) |bone_index, weight| {
+                                    if (weight == 0) continue;
+                                    skinned += zmath.mul(position.*, bone_matrices[bone_index]) * @as(Vec4, @splat(weight));
+                                }
+                                if (skinned[3] != 0) {
+                                    position.* = skinned;
+                                } else if (heaviest_bone >= 0) {
+                                    // Every influence was under the export's weight threshold, follow the heaviest bone rigidly
+                                    position.* = zmath.mul(position.*, bone_matrices[@intCast(heaviest_bone)]);
+                                }
+                            }
+                        } else {
+                            for (subdiv_mesh.base_bone_indices, positions) |i, *position| {
+                                const bone_index: usize = @intCast(i);
+                                position.* = zmath.mul(position.*, bone_matrices[bone_index]);
+                            }
+                        }
 
                         var subdiv_result = try subdiv.Polygon(.Face).cmcSubdivOnlyPoints(arena, positions, faces);
                         const subdiv_levels = subdiv_mesh.quads_per_subdiv.len;
@@ -1,10 +1,697 @@
 import bpy
 import bpy_extras
 import mathutils
-import struct
+from mathutils.bvhtree import BVHTree
 import os
+import sys
 import json
 import math
+import argparse
+import hashlib
+import types
+import numpy as np
+
+# Export options are passed after "--", eg.
+#   blender "ebike.blend" --background --python blend-to-json.py -- --binary
+def parse_arguments():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Export the open .blend file to <file>.blend.json")
+    parser.add_argument("--binary", action="store_true",
+                        help="Write vertices, polygons and bone indices to a <file>.blend.bin sidecar instead of hex strings in the json")
+    parser.add_argument("--bake-fcurves", action="store_true",
+                        help="Bake armature animation straight from the action's F-curves instead of evaluating the scene every frame")
+    parser.add_argument("--compress-animation", type=float, metavar="TOLERANCE",
+                        help="Drop bone animation samples that linear interpolation reproduces within TOLERANCE, writing per-channel key tracks")
+    parser.add_argument("--optimize-triangles", action="store_true",
+                        help="Also export triangle indices and vertex normals, ordered for the post-transform vertex cache")
+    parser.add_argument("--quantize", action="store_true",
+                        help="Store positions as 16 bit values normalized to each mesh's bounds, and bone indices as u8/u16 (needs --binary)")
+    parser.add_argument("--skin-weights", action="store_true",
+                        help="Also export the four most heavily weighted bones per vertex with their normalized weights")
+    parser.add_argument("--skin-weight-threshold", type=float, default=0.01, metavar="WEIGHT",
+                        help="Influences at or below WEIGHT are dropped before picking the top four (default 0.01)")
+    parser.add_argument("--lod-triangles", type=int, nargs="+", default=[], metavar="TRIANGLES",
+                        help="Add a decimated level of detail per triangle budget to every mesh with more triangles than that")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-export every object instead of reusing unchanged nodes from the previous export")
+    options = parser.parse_args(argv)
+    if options.quantize and not options.binary:
+        parser.error("--quantize only applies to the --binary sidecar")
+    return options
+
+# Little-endian typed arrays packed back to back into one sidecar buffer, glTF style.
+# Every view starts on a 16 byte boundary so the loader can map it straight to @Vector(4, f32) and friends.
+# Views go straight out to <path>.tmp as they are added, which replaces the sidecar once the export completes
+class BinaryBuffer:
+    alignment = 16
+    dtypes = {"f32": "<f4", "u32": "<u4", "u16": "<u2", "u8": "u1", "i8": "i1"}
+
+    def __init__(self, uri, path):
+        self.uri = uri
+        self.path = path
+        self.file = open(path + ".tmp", "wb")
+        self.byte_length = 0
+
+    def align(self):
+        padding = -self.byte_length % self.alignment
+        self.file.write(bytes(padding))
+        self.byte_length += padding
+
+    def add_view(self, component_type, values):
+        typed = np.ascontiguousarray(values, dtype=self.dtypes[component_type]).ravel()
+        self.align()
+        view = {
+            "component_type": component_type,
+            "count": typed.size,
+            "byte_offset": self.byte_length,
+            "byte_length": typed.nbytes,
+        }
+        self.file.write(typed.tobytes())
+        self.byte_length += typed.nbytes
+        return view
+
+    def copy_view(self, view, source):
+        """Carries a view over from the previous sidecar file, reading only its bytes, and returns it re-pointed into this buffer"""
+        self.align()
+        copied = dict(view, byte_offset=self.byte_length)
+        source.seek(view["byte_offset"])
+        self.file.write(source.read(view["byte_length"]))
+        self.byte_length += view["byte_length"]
+        return copied
+
+    def close(self):
+        self.file.close()
+
+    def replace(self):
+        os.replace(self.path + ".tmp", self.path)
+
+# Compact json written as it is produced - generators are streamed out as arrays one element at a time,
+# so node lists and animation frames never have to exist in memory all at once
+class JsonStreamWriter:
+    separators = (",", ":")
+
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, value):
+        if isinstance(value, types.GeneratorType):
+            self.file.write("[")
+            for index, item in enumerate(value):
+                if index:
+                    self.file.write(",")
+                self.write(item)
+            self.file.write("]")
+        elif isinstance(value, dict) and any(isinstance(item, (dict, types.GeneratorType)) for item in value.values()):
+            self.file.write("{")
+            for index, (key, item) in enumerate(value.items()):
+                if index:
+                    self.file.write(",")
+                self.file.write(json.dumps(key) + ":")
+                self.write(item)
+            self.file.write("}")
+        else:
+            json.dump(value, self.file, separators=self.separators)
+
+# Per-object cache keys from the last export live in <file>.blend.cache.json, next to the json they describe,
+# along with the byte range of each node in that json. Nodes whose key still matches are read back one at a time
+# from the previous json (and their views from the previous sidecar) rather than re-extracted.
+# The size and modification time of both files are recorded too, so ranges are never read from files they don't describe.
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+class ExportCache:
+    def __init__(self, path):
+        self.path = path
+        self.keys = {}
+        self.node_ranges = {}
+        self.previous_keys = {}
+        self.previous_ranges = {}
+        self.previous_json = None
+        self.previous_buffer = None
+
+    def load(self, output_path, binary_buffer):
+        try:
+            with open(self.path) as file:
+                previous = json.load(file)
+            previous_keys, previous_ranges = previous["keys"], previous["nodes"]
+            if previous["files"] != self.file_stamps(output_path, binary_buffer):
+                print("Previous export has changed since it was cached, exporting everything")
+                return
+            self.previous_json = open(output_path, "rb")
+            if binary_buffer is not None:
+                self.previous_buffer = open(binary_buffer.path, "rb")
+        except (OSError, ValueError, KeyError):
+            self.close()
+            return
+        self.previous_keys = previous_keys
+        self.previous_ranges = previous_ranges
+
+    def reuse(self, name, key, binary_buffer):
+        """The previous node for this object if its key is unchanged, otherwise None"""
+        self.keys[name] = key
+        node_range = self.previous_ranges.get(name)
+        if key is None or node_range is None or self.previous_keys.get(name) != key:
+            return None
+        start, end = node_range
+        self.previous_json.seek(start)
+        try:
+            node = json.loads(self.previous_json.read(end - start))
+        except ValueError:
+            node = None
+        if not isinstance(node, dict) or node.get("name") != name:
+            print("Cached node for " + name + " is unreadable, exporting it again")
+            return None
+        if node.get("mesh") is not None and binary_buffer is not None:
+            node["mesh"] = self.copy_mesh_views(node["mesh"], binary_buffer)
+        return node
+
+    def node_written(self, name, start, end):
+        self.node_ranges[name] = [start, end]
+
+    def copy_mesh_views(self, mesh, binary_buffer):
+        mesh = dict(mesh, views={view_name: binary_buffer.copy_view(view, self.previous_buffer) for view_name, view in mesh["views"].items()})
+        if "lods" in mesh:
+            mesh["lods"] = [dict(lod, mesh=self.copy_mesh_views(lod["mesh"], binary_buffer)) for lod in mesh["lods"]]
+        return mesh
+
+    def close(self):
+        for file in (self.previous_json, self.previous_buffer):
+            if file is not None:
+                file.close()
+        self.previous_json = self.previous_buffer = None
+
+    def file_stamps(self, output_path, binary_buffer):
+        return {"json": file_stamp(output_path), "bin": file_stamp(binary_buffer.path) if binary_buffer is not None else None}
+
+    def save(self, output_path, binary_buffer):
+        with open(self.path, "w") as file:
+            json.dump({"keys": self.keys, "nodes": self.node_ranges, "files": self.file_stamps(output_path, binary_buffer)}, file, indent=4)
+
+# Bulk mesh reads - foreach_get fills flat numpy buffers in one call instead of touching each vertex from python
+
+def read_polygons(mesh):
+    """Polygon sizes and their vertex indices, flattened in polygon order"""
+    polygon_sizes = np.empty(len(mesh.polygons), dtype=np.uint32)
+    mesh.polygons.foreach_get("loop_total", polygon_sizes)
+    polygon_starts = np.empty(len(mesh.polygons), dtype=np.uint32)
+    mesh.polygons.foreach_get("loop_start", polygon_starts)
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.uint32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+    # Walk loops by loop_start rather than trusting they are stored in polygon order
+    packed_starts = np.cumsum(polygon_sizes, dtype=np.int64) - polygon_sizes
+    loop_order = np.repeat(polygon_starts.astype(np.int64) - packed_starts, polygon_sizes) + np.arange(int(polygon_sizes.sum()))
+    return polygon_sizes, loop_vertices[loop_order]
+
+def read_vertex_positions(mesh):
+    """Vertex positions swizzled from blender's z-up to (-x, z, -y)"""
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    return np.stack((-co[:, 0], co[:, 2], -co[:, 1]), axis=1)
+
+def read_vertex_weights(mesh, vertex_group_count):
+    """Flat (vertex, group, weight) arrays of every deform weight in the mesh"""
+    if vertex_group_count == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    # Deform weights have no flat foreach_get source, so gather them in one pass over the vertices,
+    # into buffers sized for a few weights per vertex that grow as needed, and work on them in numpy from there
+    group_counts = np.zeros(len(mesh.vertices), dtype=np.int64)
+    capacity = len(mesh.vertices) * min(vertex_group_count, 4)
+    groups = np.empty(capacity, dtype=np.int32)
+    weights = np.empty(capacity, dtype=np.float32)
+    offset = 0
+    for vertex_index, vertex in enumerate(mesh.vertices):
+        elements = vertex.groups
+        count = len(elements)
+        if not count:
+            continue
+        if offset + count > capacity:
+            capacity = max(capacity * 2, offset + count)
+            groups = np.concatenate((groups[:offset], np.empty(capacity - offset, dtype=np.int32)))
+            weights = np.concatenate((weights[:offset], np.empty(capacity - offset, dtype=np.float32)))
+        elements.foreach_get("group", groups[offset:offset + count])
+        elements.foreach_get("weight", weights[offset:offset + count])
+        group_counts[vertex_index] = count
+        offset += count
+    vertices = np.repeat(np.arange(len(group_counts)), group_counts)
+    return vertices, groups[:offset], weights[:offset]
+
+def read_mesh(object_eval):
+    """Polygons, positions and deform weights of an evaluated object, read through a temporary mesh that is freed straight away"""
+    mesh = object_eval.to_mesh()
+    try:
+        return (*read_polygons(mesh), read_vertex_positions(mesh), read_vertex_weights(mesh, len(object_eval.vertex_groups)))
+    finally:
+        object_eval.to_mesh_clear()
+
+def heaviest_bone_indices(vertex_count, vertex_weights):
+    """Most heavily weighted vertex group per vertex, -1 where a vertex has no positive weight"""
+    bone_indices = np.full(vertex_count, -1, dtype=np.int32)
+    vertices, groups, weights = vertex_weights
+    total = len(vertices)
+    if total == 0:
+        return bone_indices
+    # Stable sort keeps the first of equally weighted groups, like the old strict > scan did
+    order = np.lexsort((-weights, vertices))
+    vertices, groups, weights = vertices[order], groups[order], weights[order]
+    heaviest = np.ones(total, dtype=bool)
+    heaviest[1:] = vertices[1:] != vertices[:-1]
+    heaviest &= weights > 0
+    bone_indices[vertices[heaviest]] = groups[heaviest]
+    return bone_indices
+
+# Skin weights - up to skin_influence_count bones per vertex, heaviest first, with weights summing to 1.
+# Unused slots are bone 0 with weight 0
+
+skin_influence_count = 4
+
+def top_skin_influences(vertex_count, vertex_weights, threshold):
+    """(vertices, skin_influence_count) bone indices and normalized weights"""
+    bone_indices = np.zeros((vertex_count, skin_influence_count), dtype=np.int32)
+    skin_weights = np.zeros((vertex_count, skin_influence_count), dtype=np.float32)
+    vertices, groups, weights = vertex_weights
+    kept = weights > threshold
+    vertices, groups, weights = vertices[kept], groups[kept], weights[kept]
+    if len(vertices) == 0:
+        return bone_indices, skin_weights
+    order = np.lexsort((-weights, vertices))
+    vertices, groups, weights = vertices[order], groups[order], weights[order]
+    # Position of each influence within its vertex's run, heaviest at 0
+    run_starts = np.flatnonzero(np.r_[True, vertices[1:] != vertices[:-1]])
+    ranks = np.arange(len(vertices)) - np.repeat(run_starts, np.diff(np.r_[run_starts, len(vertices)]))
+    top = ranks < skin_influence_count
+    bone_indices[vertices[top], ranks[top]] = groups[top]
+    skin_weights[vertices[top], ranks[top]] = weights[top]
+    totals = skin_weights.sum(axis=1, keepdims=True)
+    np.divide(skin_weights, totals, out=skin_weights, where=totals > 0)
+    return bone_indices, skin_weights
+
+# Triangle export - fan triangulation and normals match mesh_helper's toTriangleIndices and calculateNormals,
+# then triangles are reordered with Tipsify (Sander et al. 2007) and vertices renumbered in order of first use
+
+vertex_cache_size = 16
+# calculateNormals only averages the first max_polygons_per_vertex polygons it meets at each vertex
+max_polygons_per_vertex = 8
+
+def fan_triangles(polygon_sizes, polygon_indices):
+    """(p0, p[i + 1], p[i]) per fan triangle, and the polygon each triangle came from"""
+    polygon_starts = np.cumsum(polygon_sizes, dtype=np.int64) - polygon_sizes
+    triangle_counts = np.maximum(polygon_sizes.astype(np.int64) - 2, 0)
+    triangle_polygons = np.repeat(np.arange(len(polygon_sizes)), triangle_counts)
+    fan_offsets = np.arange(int(triangle_counts.sum())) - np.repeat(np.cumsum(triangle_counts) - triangle_counts, triangle_counts) + 1
+    first = polygon_starts[triangle_polygons]
+    triangles = np.stack((
+        polygon_indices[first],
+        polygon_indices[first + fan_offsets + 1],
+        polygon_indices[first + fan_offsets],
+    ), axis=1)
+    return triangles, triangle_polygons
+
+def vertex_normals(co, polygon_sizes, polygon_indices, triangles, triangle_polygons):
+    """Average of the unit normals of the first max_polygons_per_vertex polygons touching a vertex, (x, y, z, 0)"""
+    a, b, c = co[triangles[:, 0]], co[triangles[:, 1]], co[triangles[:, 2]]
+    polygon_normals = np.zeros((len(polygon_sizes), 3))
+    np.add.at(polygon_normals, triangle_polygons, -np.cross(c - a, b - a))
+    lengths = np.linalg.norm(polygon_normals, axis=1, keepdims=True)
+    polygon_normals = np.divide(polygon_normals, lengths, out=np.zeros_like(polygon_normals), where=lengths > 0)
+    normals = np.zeros((len(co), 4), dtype=np.float32)
+    corner_normals = np.repeat(polygon_normals, polygon_sizes, axis=0)
+    # Rank of each corner among its vertex's corners in polygon order, to drop those past the cap
+    corner_order = np.argsort(polygon_indices, kind="stable")
+    sorted_vertices = polygon_indices[corner_order]
+    run_starts = np.flatnonzero(np.r_[True, sorted_vertices[1:] != sorted_vertices[:-1]])
+    ranks = np.empty(len(polygon_indices), dtype=np.int64)
+    ranks[corner_order] = np.arange(len(polygon_indices)) - np.repeat(run_starts, np.diff(np.r_[run_starts, len(polygon_indices)]))
+    counted = ranks < max_polygons_per_vertex
+    summed = np.zeros((len(co), 3))
+    np.add.at(summed, polygon_indices[counted], corner_normals[counted])
+    counts = np.bincount(polygon_indices[counted], minlength=len(co))[:, None]
+    normals[:, :3] = np.divide(summed, counts, out=np.zeros_like(summed), where=counts > 0)
+    return normals
+
+def average_cache_miss_ratio(triangles, cache_size=vertex_cache_size):
+    """Vertex shader invocations per triangle through a FIFO post-transform cache"""
+    if len(triangles) == 0:
+        return 0.0
+    cache = [-1] * cache_size
+    cached = set()
+    head = 0
+    misses = 0
+    for vertex in triangles.ravel().tolist():
+        if vertex not in cached:
+            misses += 1
+            cached.discard(cache[head])
+            cache[head] = vertex
+            cached.add(vertex)
+            head = (head + 1) % cache_size
+    return misses / len(triangles)
+
+def tipsify(triangles, vertex_count, cache_size=vertex_cache_size):
+    """Triangle order that fans around recently used vertices, keeping the FIFO cache warm"""
+    # Vertex -> triangle adjacency as one flat array plus offsets
+    corners = triangles.ravel()
+    adjacency = np.argsort(corners, kind="stable") // 3
+    adjacency_starts = np.concatenate(([0], np.cumsum(np.bincount(corners, minlength=vertex_count)))).tolist()
+    adjacency = adjacency.tolist()
+    live_triangles = np.bincount(corners, minlength=vertex_count).tolist()
+    triangle_list = triangles.tolist()
+    cache_time = [0] * vertex_count
+    emitted = [False] * len(triangle_list)
+    order = []
+    dead_ends = []
+    time = cache_size + 1
+    cursor = 0
+    fanning = 0 if vertex_count else -1
+    while fanning >= 0:
+        candidates = []
+        for triangle in adjacency[adjacency_starts[fanning]:adjacency_starts[fanning + 1]]:
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = True
+            order.append(triangle)
+            for vertex in triangle_list[triangle]:
+                dead_ends.append(vertex)
+                candidates.append(vertex)
+                live_triangles[vertex] -= 1
+                if time - cache_time[vertex] > cache_size:
+                    cache_time[vertex] = time
+                    time += 1
+        # Next fanning vertex is the one still in cache whose remaining triangles fit before it is evicted
+        fanning = -1
+        best_priority = -1
+        for vertex in candidates:
+            if live_triangles[vertex] > 0:
+                priority = 0
+                if time - cache_time[vertex] + 2 * live_triangles[vertex] <= cache_size:
+                    priority = time - cache_time[vertex]
+                if priority > best_priority:
+                    best_priority = priority
+                    fanning = vertex
+        if fanning < 0:
+            while dead_ends:
+                vertex = dead_ends.pop()
+                if live_triangles[vertex] > 0:
+                    fanning = vertex
+                    break
+        if fanning < 0:
+            while cursor < vertex_count:
+                if live_triangles[cursor] > 0:
+                    fanning = cursor
+                    break
+                cursor += 1
+    return triangles[np.array(order, dtype=np.int64)] if order else triangles
+
+def first_use_vertex_order(triangles, vertex_count):
+    """Old vertex index for each new index - referenced vertices in order of first use, then the rest"""
+    _, first_use = np.unique(triangles.ravel(), return_index=True)
+    used = triangles.ravel()[np.sort(first_use)]
+    unused = np.setdiff1d(np.arange(vertex_count), used, assume_unique=True)
+    return np.concatenate((used, unused))
+
+def optimize_triangles(polygon_sizes, polygon_indices, co):
+    """Triangles and normals for cache-friendly drawing, the polygons renumbered to match, the old index of each new vertex
+    for reordering other per-vertex data, and the ACMR before and after"""
+    triangles, triangle_polygons = fan_triangles(polygon_sizes, polygon_indices)
+    normals = vertex_normals(co, polygon_sizes, polygon_indices, triangles, triangle_polygons)
+    acmr_before = average_cache_miss_ratio(triangles)
+    triangles = tipsify(triangles, len(co))
+    vertex_order = first_use_vertex_order(triangles, len(co))
+    remap = np.empty(len(co), dtype=np.uint32)
+    remap[vertex_order] = np.arange(len(co), dtype=np.uint32)
+    triangles = remap[triangles]
+    acmr = {"before": acmr_before, "after": average_cache_miss_ratio(triangles)}
+    return remap[polygon_indices], triangles, normals[vertex_order], vertex_order, acmr
+
+# Levels of detail - Blender's collapse decimation is quadric error edge collapse, so each level is the evaluated mesh
+# with one temporarily appended, finest level first
+
+def triangle_count(polygon_sizes):
+    return int(np.maximum(polygon_sizes.astype(np.int64) - 2, 0).sum())
+
+def decimated_lods(object, mesh_arrays):
+    """(triangle budget, mesh arrays) for each --lod-triangles budget below the mesh's own triangle count"""
+    full_triangle_count = triangle_count(mesh_arrays[0])
+    for triangle_budget in sorted(options.lod_triangles, reverse=True):
+        if triangle_budget >= full_triangle_count:
+            continue
+        modifier = object.modifiers.new("export_lod", "DECIMATE")
+        modifier.decimate_type = "COLLAPSE"
+        modifier.use_collapse_triangulate = True
+        modifier.ratio = triangle_budget / full_triangle_count
+        try:
+            lod_arrays = read_mesh(object.evaluated_get(bpy.context.evaluated_depsgraph_get()))
+        finally:
+            object.modifiers.remove(modifier)
+        yield triangle_budget, lod_arrays
+
+def geometric_error(mesh_arrays, lod_arrays):
+    """Furthest any vertex of the full mesh sits from the decimated surface, in export units"""
+    polygon_sizes, polygon_indices, co, _ = lod_arrays
+    polygon_ends = np.cumsum(polygon_sizes)[:-1]
+    polygons = [polygon.tolist() for polygon in np.split(polygon_indices, polygon_ends)] if len(polygon_sizes) else []
+    surface = BVHTree.FromPolygons(co.tolist(), polygons)
+    error = 0.0
+    for vertex in mesh_arrays[2].tolist():
+        nearest = surface.find_nearest(vertex)
+        if nearest[0] is not None:
+            error = max(error, nearest[3])
+    return error
+
+# Quantization - positions become u16 steps across the mesh's bounding box, position = min + value * scale
+
+def quantize_positions(co):
+    """u16 (x, y, z) per vertex, with the dequantization parameters and the worst per-axis error they cause"""
+    low = co.min(axis=0) if len(co) else np.zeros(3, dtype=np.float32)
+    high = co.max(axis=0) if len(co) else np.zeros(3, dtype=np.float32)
+    scale = (high.astype(np.float64) - low) / 65535
+    steps = np.divide(co - low, scale, out=np.zeros(co.shape), where=scale > 0)
+    quantized = np.clip(np.rint(steps), 0, 65535).astype(np.uint16)
+    restored = low.astype(np.float32) + quantized * scale.astype(np.float32)
+    max_error = float(np.abs(restored - co).max(initial=0))
+    return quantized, {"min": low.tolist(), "scale": scale.tolist(), "max_error": max_error}
+
+def narrow_bone_indices(bone_indices, bone_count):
+    """Smallest unsigned type that fits every bone, with its largest value standing in for "no bone" (-1)"""
+    component_type, none = ("u8", 0xFF) if bone_count < 0xFF else ("u16", 0xFFFF)
+    return component_type, np.where(bone_indices < 0, none, bone_indices)
+
+# Armature animation is baked to a (frames, bones, 10) array of position xyz, rotation xyzw and scale xyz per bone,
+# already swizzled into the engine's axes
+
+def pose_track(matrix):
+    translation, rotation, scale = matrix.decompose()
+    rotation = rotation @ correction_rotation
+    return (
+        -translation.x, translation.z, -translation.y,
+        -rotation.x, rotation.z, -rotation.y, -rotation.w,
+        scale.x, scale.z, scale.y,
+    )
+
+def bake_pose_from_scene(object, frames):
+    """Reads pose_bone.matrix after evaluating the whole scene at each frame - handles constraints, drivers and NLA"""
+    pose_bones = [object.pose.bones.get(bone.name) for bone in object.data.bones]
+    pose_bones = [pose_bone for pose_bone in pose_bones if pose_bone]
+    tracks = np.empty((len(frames), len(pose_bones), 10))
+    for frame_index, frame in enumerate(frames):
+        bpy.context.scene.frame_set(frame)
+        for bone_index, pose_bone in enumerate(pose_bones):
+            tracks[frame_index, bone_index] = pose_track(pose_bone.matrix)
+    # Meshes are read at the rest frame, put the scene back there for them
+    bpy.context.scene.frame_set(bpy.context.scene.frame_start)
+    return tracks
+
+def can_bake_from_fcurves(object):
+    """F-curve baking only covers a plain action driving bones that fully inherit from their parents"""
+    animation_data = object.animation_data
+    if animation_data is None or animation_data.action is None:
+        return False
+    if len(animation_data.nla_tracks) or len(animation_data.drivers):
+        return False
+    for pose_bone in object.pose.bones:
+        bone = pose_bone.bone
+        if len(pose_bone.constraints) or not bone.use_inherit_rotation or bone.inherit_scale != "FULL" or not bone.use_local_location:
+            return False
+    return True
+
+def bake_pose_from_fcurves(object, frames):
+    """Evaluates the action's F-curves and walks the bone hierarchy directly, without touching the depsgraph"""
+    fcurves = {(fcurve.data_path, fcurve.array_index): fcurve for fcurve in object.animation_data.action.fcurves}
+
+    def channel(pose_bone, property_name, size):
+        data_path = 'pose.bones["{}"].{}'.format(bpy.utils.escape_identifier(pose_bone.name), property_name)
+        rest = getattr(pose_bone, property_name)
+        curves = [fcurves.get((data_path, index)) for index in range(size)]
+        # Unanimated channels keep their current value for every frame
+        return np.array([[curve.evaluate(frame) if curve else rest[index] for index, curve in enumerate(curves)] for frame in frames])
+
+    bones = object.data.bones
+    pose_bones = [object.pose.bones.get(bone.name) for bone in bones]
+    pose_bones = [pose_bone for pose_bone in pose_bones if pose_bone]
+    tracks = np.empty((len(frames), len(pose_bones), 10))
+    pose_matrices = {}
+    # Parents always come before their children in armature.bones, so one pass resolves the whole chain
+    for bone_index, pose_bone in enumerate(pose_bones):
+        bone = pose_bone.bone
+        if bone.parent is not None:
+            parent_offset = bone.parent.matrix_local.inverted() @ bone.matrix_local
+        else:
+            parent_offset = bone.matrix_local
+        if bone.use_connect:
+            # Blender ignores the location of a bone connected to its parent
+            locations = np.zeros((len(frames), 3))
+        else:
+            locations = channel(pose_bone, "location", 3)
+        scales = channel(pose_bone, "scale", 3)
+        if pose_bone.rotation_mode == "QUATERNION":
+            rotations = [mathutils.Quaternion(tuple(value)).normalized() for value in channel(pose_bone, "rotation_quaternion", 4)]
+        elif pose_bone.rotation_mode == "AXIS_ANGLE":
+            rotations = [mathutils.Quaternion(mathutils.Vector(value[1:]), value[0]) for value in channel(pose_bone, "rotation_axis_angle", 4)]
+        else:
+            rotations = [mathutils.Euler(tuple(value), pose_bone.rotation_mode).to_quaternion() for value in channel(pose_bone, "rotation_euler", 3)]
+        matrices = []
+        for frame_index, (location, rotation, scale) in enumerate(zip(locations, rotations, scales)):
+            basis = mathutils.Matrix.LocRotScale(mathutils.Vector(location), rotation, mathutils.Vector(scale))
+            matrix = parent_offset @ basis
+            if bone.parent is not None:
+                matrix = pose_matrices[bone.parent.name][frame_index] @ matrix
+            matrices.append(matrix)
+            tracks[frame_index, bone_index] = pose_track(matrix)
+        pose_matrices[bone.name] = matrices
+    return tracks
+
+# Keyframe reduction - each channel keeps only the samples that interpolating between neighbouring keys can't reproduce
+
+def lerp(a, b, t):
+    return a + (b - a) * t
+
+def slerp(a, b, t):
+    dot = np.clip(np.dot(a, b), -1, 1)
+    if dot > 0.9995:
+        result = lerp(a, b, t)
+        return result / np.linalg.norm(result, axis=-1, keepdims=True)
+    theta = np.arccos(dot)
+    return (np.sin((1 - t) * theta) * a + np.sin(t * theta) * b) / np.sin(theta)
+
+def segment_fits(samples, start, end, interpolate, tolerance):
+    t = ((np.arange(start + 1, end) - start) / (end - start))[:, None]
+    return np.abs(interpolate(samples[start], samples[end], t) - samples[start + 1:end]).max(initial=0) <= tolerance
+
+def reduce_keys(samples, interpolate, tolerance):
+    """Greedily grows each segment until a skipped sample drifts past tolerance, always keeping the first and last sample"""
+    last = len(samples) - 1
+    if np.abs(samples - samples[0]).max(initial=0) <= tolerance:
+        return [0]
+    keys = [0]
+    start, end = 0, 1
+    while end < last:
+        if segment_fits(samples, start, end + 1, interpolate, tolerance):
+            end += 1
+        else:
+            keys.append(end)
+            start, end = end, end + 1
+    keys.append(last)
+    return keys
+
+def compress_tracks(tracks, tolerance):
+    """Per bone position/rotation/scale key tracks, times are frame offsets from the first exported frame"""
+    rotations = tracks[:, :, 3:7].copy()
+    # Keep neighbouring quaternions on the same hemisphere so interpolation takes the short way round
+    for frame_index in range(1, len(rotations)):
+        flip = np.sum(rotations[frame_index] * rotations[frame_index - 1], axis=-1) < 0
+        rotations[frame_index, flip] *= -1
+    channels = {
+        "position": (np.concatenate((tracks[:, :, 0:3], np.ones(tracks.shape[:2] + (1,))), axis=-1), lerp),
+        "rotation": (rotations, slerp),
+        "scale": (np.concatenate((tracks[:, :, 7:10], np.zeros(tracks.shape[:2] + (1,))), axis=-1), lerp),
+    }
+    bone_tracks = []
+    for bone_index in range(tracks.shape[1]):
+        bone_track = {}
+        for name, (samples, interpolate) in channels.items():
+            keys = reduce_keys(samples[:, bone_index], interpolate, tolerance)
+            bone_track[name] = {"times": keys, "values": samples[keys, bone_index].tolist()}
+        bone_tracks.append(bone_track)
+    return bone_tracks
+
+# Cache keys - a digest of everything that feeds into an object's exported node
+
+def hash_values(digest, *values):
+    for value in values:
+        digest.update(value.tobytes() if isinstance(value, np.ndarray) else repr(value).encode())
+
+def hash_rna_properties(digest, struct):
+    """Every editable property of a modifier, constraint and the like"""
+    for prop in struct.bl_rna.properties:
+        if not prop.is_readonly:
+            hash_values(digest, prop.identifier, getattr(struct, prop.identifier))
+
+def hash_animation_data(digest, animation_data):
+    if animation_data is None:
+        return
+    if animation_data.action is not None:
+        for fcurve in animation_data.action.fcurves:
+            points = {name: np.empty(len(fcurve.keyframe_points) * 2, dtype=np.float32) for name in ("co", "handle_left", "handle_right")}
+            for name, values in points.items():
+                fcurve.keyframe_points.foreach_get(name, values)
+            hash_values(digest, fcurve.data_path, fcurve.array_index, fcurve.extrapolation, *points.values(),
+                        [(keyframe.interpolation, keyframe.easing) for keyframe in fcurve.keyframe_points])
+            for modifier in fcurve.modifiers:
+                hash_rna_properties(digest, modifier)
+
+def depends_on_other_data(object):
+    """Constraints, drivers and NLA strips can read other objects and actions, which the cache key doesn't follow"""
+    animation_data = object.animation_data
+    if animation_data is not None and (len(animation_data.nla_tracks) or len(animation_data.drivers)):
+        return True
+    return any(len(pose_bone.constraints) for pose_bone in object.pose.bones)
+
+def node_cache_key(object, mesh_arrays=None):
+    """Digest of the object's export inputs, None when they can't all be hashed and the node must always be re-exported"""
+    if object.type == "ARMATURE" and depends_on_other_data(object):
+        return None
+    digest = hashlib.sha256()
+    hash_values(digest, script_source, export_options, bpy.context.scene.render.fps)
+    hash_values(digest, object.name, object.type, object.parent.name if object.parent else None, [list(row) for row in object.matrix_local])
+    if object.type == "ARMATURE":
+        hash_values(digest, [list(row) for row in object.matrix_world], bpy.context.scene.frame_start, bpy.context.scene.frame_end)
+        hash_values(digest, object.data.pose_position)
+        for bone in object.data.bones:
+            hash_values(digest, bone.name, bone.parent.name if bone.parent else None, [list(row) for row in bone.matrix_local])
+            # These decide whether --bake-fcurves applies, and how a bone follows its parent
+            hash_values(digest, bone.use_connect, bone.use_inherit_rotation, bone.inherit_scale, bone.use_local_location)
+        for pose_bone in object.pose.bones:
+            # Unkeyed channels keep the static pose in both bake paths
+            hash_values(digest, pose_bone.name, pose_bone.rotation_mode, tuple(pose_bone.location), tuple(pose_bone.rotation_quaternion),
+                        tuple(pose_bone.rotation_euler), tuple(pose_bone.rotation_axis_angle), tuple(pose_bone.scale))
+        hash_animation_data(digest, object.animation_data)
+    if object.type == "MESH":
+        # Decides whether quantized bone and skin indices are written as u8 or u16
+        hash_values(digest, len(object.vertex_groups))
+        for mod in object.modifiers:
+            hash_rna_properties(digest, mod)
+        # The evaluated mesh covers armature and other modifier inputs
+        polygon_sizes, polygon_indices, co, vertex_weights = mesh_arrays
+        hash_values(digest, polygon_sizes, polygon_indices, co, *vertex_weights)
+    return digest.hexdigest()
+
+options = parse_arguments()
+
+output_path = bpy.path.abspath("//") + os.path.basename(bpy.context.blend_data.filepath) + ".json"
+binary_uri = os.path.basename(bpy.context.blend_data.filepath) + ".bin"
+binary_buffer = BinaryBuffer(binary_uri, bpy.path.abspath("//") + binary_uri) if options.binary else None
+export_cache = ExportCache(bpy.path.abspath("//") + os.path.basename(bpy.context.blend_data.filepath) + ".cache.json")
+if not options.no_cache:
+    export_cache.load(output_path, binary_buffer)
+try:
+    with open(__file__, "rb") as file:
+        script_source = file.read()
+except OSError:
+    # Run from Blender's text editor, __file__ names the text block rather than a file on disk
+    text = bpy.data.texts.get(os.path.basename(__file__))
+    script_source = text.as_string().encode() if text is not None else b""
+export_options = {name: value for name, value in vars(options).items() if name != "no_cache"}
 
 # get out of edit mode
 bpy.ops.object.mode_set(mode="OBJECT")
@@ -13,175 +700,217 @@ correction_rotation = mathutils.Euler((math.radians(-90), 0, 0), 'XYZ').to_quate
 
 # For each mesh, gather all polygons, these we'll export seperately to a json format - mesh -> polygons (indices)
 meshes = []
-nodes = []
 armatures = []
+
+# Only activate modifiers that are set to show in render (we are that render)
 for object in bpy.data.objects:
-    print("Exporting " + object.name + " " + object.type)
-    mat = object.matrix_local;
-    translation, rotation, scale =  mat.decompose() # Transform a point in bone space to "Armature" space
-    object_data = {
-        "name": object.name,
-        "type": object.type,
-        "parent": object.parent.name if object.parent != None else None,
-        "position": [
-            -translation.x,
-            translation.z,
-            -translation.y,
-            1,
-        ],
-        "rotation": [
-            rotation.x,
-            -rotation.z,
-            rotation.y,
-            rotation.w,
-        ],
-        "scale": [
-            scale.x,
-            scale.z,
-            scale.y,
-            0,
-        ],
-
-    };
-    if object.type == "ARMATURE":
-        armature = object.data
-        bones = []
-        for bone in armature.bones:
-            mat = object.matrix_world @ bone.matrix_local;
-            translation, rotation, scale =  mat.decompose() # Transform a point in bone space to "Armature" space
-            # rotation = correction_rotation @ rotation
-            rotation = rotation @ correction_rotation
-            bones.append(
-                {
-                    "name": bone.name,
-                    "parent": bone.parent.name if bone.parent != None else None,
-                    "rest":{
-                        "position": [
-                            -translation.x,
-                            translation.z,
-                            -translation.y,
-                            1,
-                        ],
-                        "rotation": [
-                            -rotation.x,
-                            rotation.z,
-                            -rotation.y,
-                            -rotation.w,
-                        ],
-                        "scale": [
-                            scale.x,
-                            scale.z,
-                            scale.y,
-                            0,
-                        ],
-                    }
-                }
-            )
+    if object.type == "MESH":
+        modifiers_to_remove = [mod for mod in object.modifiers if not mod.show_render]
+        for mod in modifiers_to_remove:
+            object.modifiers.remove(mod)
 
-        frame_start = bpy.context.scene.frame_start
-        frame_end = bpy.context.scene.frame_end
-        animation = []
+# Every mesh is read from one evaluation of the scene at the rest frame
+bpy.context.scene.frame_set(bpy.context.scene.frame_start)
 
-        for frame in range(frame_start, frame_end + 1):
-            bpy.context.scene.frame_set(frame)
-            frame_data = {"frame": frame, "bones": []}
+def export_mesh(object, mesh_arrays):
+    """The mesh as json, or as views into the binary sidecar, with whatever extras the options ask for"""
+    polygon_sizes, polygon_indices, co, vertex_weights = mesh_arrays
+    bone_indices = heaviest_bone_indices(len(co), vertex_weights)
+    skin_indices = skin_weights = None
+    if options.skin_weights:
+        skin_indices, skin_weights = top_skin_influences(len(co), vertex_weights, options.skin_weight_threshold)
+    triangles = normals = None
+    if options.optimize_triangles:
+        polygon_indices, triangles, normals, vertex_order, acmr = optimize_triangles(polygon_sizes, polygon_indices, co)
+        print("ACMR of " + object.name + " {before:.3f} -> {after:.3f}".format(**acmr))
+        co, bone_indices = co[vertex_order], bone_indices[vertex_order]
+        if skin_weights is not None:
+            skin_indices, skin_weights = skin_indices[vertex_order], skin_weights[vertex_order]
 
+    if binary_buffer is not None:
+        # The runtime keeps bone indices as i8, so larger ones would wrap to another bone or fail to load
+        if len(bone_indices) and bone_indices.max() > 127:
+            raise ValueError(object.name + " uses vertex group {} but bone indices only go up to 127".format(int(bone_indices.max())))
+        views = {
+            "polygon_sizes": binary_buffer.add_view("u32", polygon_sizes),
+            "polygon_indices": binary_buffer.add_view("u32", polygon_indices),
+        }
+        mesh = {"views": views}
+        if options.quantize:
+            quantized, quantization = quantize_positions(co)
+            print("Quantized " + object.name + ", max position error {:.6f}".format(quantization["max_error"]))
+            bone_type, narrowed_bone_indices = narrow_bone_indices(bone_indices, len(object.vertex_groups))
+            views["vertices"] = binary_buffer.add_view("u16", quantized)
+            views["bone_indices"] = binary_buffer.add_view(bone_type, narrowed_bone_indices)
+            mesh["quantization"] = quantization
+        else:
+            # Positions go out as (x, y, z, 1) so they line up with mesh_helper.Point without a decode step
+            positions = np.ones((len(co), 4), dtype=np.float32)
+            positions[:, :3] = co
+            views["vertices"] = binary_buffer.add_view("f32", positions)
+            views["bone_indices"] = binary_buffer.add_view("i8", bone_indices)
+        if triangles is not None:
+            views["triangle_indices"] = binary_buffer.add_view("u32", triangles)
+            views["normals"] = binary_buffer.add_view("f32", normals)
+        if skin_weights is not None:
+            views["skin_indices"] = binary_buffer.add_view("u8" if len(object.vertex_groups) <= 0x100 else "u16", skin_indices)
+            views["skin_weights"] = binary_buffer.add_view("f32", skin_weights)
+    else:
+        polygon_ends = np.cumsum(polygon_sizes)[:-1]
+        mesh = {
+            "polygons": [polygon.tolist() for polygon in np.split(polygon_indices, polygon_ends)] if len(polygon_sizes) else [],
+            "vertices": co.astype("<f4").tobytes().hex(),
+            "bone_indices": bone_indices.tolist(),
+        }
+        if triangles is not None:
+            mesh["triangles"] = triangles.ravel().tolist()
+            mesh["normals"] = normals[:, :3].astype("<f4").tobytes().hex()
+        if skin_weights is not None:
+            mesh["skin_indices"] = skin_indices.ravel().tolist()
+            mesh["skin_weights"] = skin_weights.ravel().tolist()
+    if triangles is not None:
+        mesh["acmr"] = acmr
+    return mesh
+
+def export_nodes():
+    """Yields each object's node as soon as it is built, so only one node is held in memory at a time"""
+    for object in bpy.data.objects:
+        mesh_arrays = None
+        if object.type == "MESH":
+            mesh_arrays = read_mesh(object.evaluated_get(bpy.context.evaluated_depsgraph_get()))
+
+        cached_node = export_cache.reuse(object.name, node_cache_key(object, mesh_arrays), binary_buffer)
+        if cached_node is not None:
+            print("Reusing " + object.name + " " + object.type)
+            yield cached_node
+            continue
+
+        print("Exporting " + object.name + " " + object.type)
+        mat = object.matrix_local;
+        translation, rotation, scale =  mat.decompose() # Transform a point in bone space to "Armature" space
+        object_data = {
+            "name": object.name,
+            "type": object.type,
+            "parent": object.parent.name if object.parent != None else None,
+            "position": [
+                -translation.x,
+                translation.z,
+                -translation.y,
+                1,
+            ],
+            "rotation": [
+                rotation.x,
+                -rotation.z,
+                rotation.y,
+                rotation.w,
+            ],
+            "scale": [
+                scale.x,
+                scale.z,
+                scale.y,
+                0,
+            ],
+
+        };
+        if object.type == "ARMATURE":
+            armature = object.data
+            bones = []
             for bone in armature.bones:
-                pose_bone = object.pose.bones.get(bone.name)
-                if pose_bone:
-                    mat = pose_bone.matrix;
-                    translation, rotation, scale = mat.decompose() # Transform a point in bone space to "Armature" space
-                    rotation = rotation @ correction_rotation
-                    frame_data["bones"].append({
-                        "position": [
-                            -translation.x,
-                            translation.z,
-                            -translation.y,
-                            1,
-                        ],
-                        "rotation": [
-                            -rotation.x,
-                            rotation.z,
-                            -rotation.y,
-                            -rotation.w,
-                        ],
-                        "scale": [
-                            scale.x,
-                            scale.z,
-                            scale.y,
-                            0,
+                mat = object.matrix_world @ bone.matrix_local;
+                translation, rotation, scale =  mat.decompose() # Transform a point in bone space to "Armature" space
+                # rotation = correction_rotation @ rotation
+                rotation = rotation @ correction_rotation
+                bones.append(
+                    {
+                        "name": bone.name,
+                        "parent": bone.parent.name if bone.parent != None else None,
+                        "rest":{
+                            "position": [
+                                -translation.x,
+                                translation.z,
+                                -translation.y,
+                                1,
+                            ],
+                            "rotation": [
+                                -rotation.x,
+                                rotation.z,
+                                -rotation.y,
+                                -rotation.w,
+                            ],
+                            "scale": [
+                                scale.x,
+                                scale.z,
+                                scale.y,
+                                0,
+                            ],
+                        }
+                    }
+                )
+
+            frame_start = bpy.context.scene.frame_start
+            frame_end = bpy.context.scene.frame_end
+            frames = range(frame_start, frame_end + 1)
+            if options.bake_fcurves and can_bake_from_fcurves(object):
+                tracks = bake_pose_from_fcurves(object, frames)
+            else:
+                tracks = bake_pose_from_scene(object, frames)
+
+            if options.compress_animation is not None:
+                object_data["armature"] = {
+                    "bones": bones,
+                    "frame_count": len(frames),
+                    "tracks": compress_tracks(tracks, options.compress_animation),
+                }
+            else:
+                animation = (
+                    {
+                        "frame": frame,
+                        "bones": [
+                            {
+                                "position": [*bone_track[0:3], 1],
+                                "rotation": bone_track[3:7],
+                                "scale": [*bone_track[7:10], 0],
+                            }
+                            for bone_track in frame_tracks.tolist()
                         ],
-                    })
-            animation.append(frame_data)
-        object_data["armature"] = {"bones": bones, "animation": animation}
+                    }
+                    for frame, frame_tracks in zip(frames, tracks)
+                )
+                object_data["armature"] = {"bones": bones, "animation": animation}
 
-    if object.type == "MESH":
-        bpy.context.view_layer.objects.active = object
+        if object.type == "MESH":
+            object_data["mesh"] = export_mesh(object, mesh_arrays)
+            lods = []
+            for triangle_budget, lod_arrays in decimated_lods(object, mesh_arrays):
+                lod = {"triangle_count": triangle_count(lod_arrays[0]), "geometric_error": geometric_error(mesh_arrays, lod_arrays)}
+                print("LOD of " + object.name + " with {triangle_count} triangles, error {geometric_error:.6f}".format(**lod))
+                lod["mesh"] = export_mesh(object, lod_arrays)
+                lods.append(lod)
+            if lods:
+                object_data["mesh"]["lods"] = lods
+        yield object_data
 
-        # Only activate modifiers that are set to show in render (we are that render)
-        modifiers_to_remove = [mod for mod in object.modifiers if not mod.show_render]
-        for mod in modifiers_to_remove:
-            object.modifiers.remove(mod)
 
-        depsgraph = bpy.context.evaluated_depsgraph_get()
-        object_eval = object.evaluated_get(depsgraph)
-        mesh = bpy.data.meshes.new_from_object(object_eval)
-
-        polygons = []
-        for polygon in mesh.polygons:
-            polygonRes = []
-            for index in polygon.vertices:
-                polygonRes.append(index)
-            polygons.append(polygonRes)
-
-        bpy.context.scene.frame_set(bpy.context.scene.frame_start)
-
-        depsgraph = bpy.context.evaluated_depsgraph_get()
-        object_eval = object.evaluated_get(depsgraph)
-        mesh = bpy.data.meshes.new_from_object(object_eval)
-
-        vertex_strings = []
-        bone_indices = []
-        for vertex in mesh.vertices:
-            vertex_array = [-vertex.co.x, vertex.co.z, -vertex.co.y]
-            vertex_string = ''.join(''.join(format(byte, '02x') for byte in struct.pack('<f', value)) for value in vertex_array)
-            vertex_strings.append(vertex_string)
-
-            # Find most heavily weighted bone
-            max_weight = 0
-            max_bone_index = -1
-            for group in vertex.groups:
-                weight = group.weight
-                if weight > max_weight:
-                    max_weight = weight
-                    max_bone_index = group.group
-            bone_indices.append(max_bone_index)
-
-        object_data["mesh"] = {
-            "polygons": polygons,
-            "vertices": ''.join(vertex_strings),
-            "bone_indices": bone_indices,
-        }
-    nodes.append(object_data)
-
-with open(
-    bpy.path.abspath("//")
-    + os.path.basename(bpy.context.blend_data.filepath)
-    + ".json",
-    "w",
-) as file:
-    json.dump(
-        {
-            "framerate": bpy.context.scene.render.fps,
-            "nodes": nodes,
-        },
-        file,
-        indent=4,
-    )
-print(
-    "Export of "
-    + bpy.path.abspath("//")
-    + os.path.basename(bpy.context.blend_data.filepath)
-    + ".json"
-    + " complete"
-)
+# Written to temporary files first so a failed export never leaves a truncated json or sidecar next to a stale cache
+with open(output_path + ".tmp", "w", encoding="utf-8") as file:
+    writer = JsonStreamWriter(file)
+    file.write('{"framerate":' + json.dumps(bpy.context.scene.render.fps) + ',"nodes":[')
+    for index, node in enumerate(export_nodes()):
+        if index:
+            file.write(",")
+        # The json is all ascii, so tell() is a byte offset the next export can seek to
+        start = file.tell()
+        writer.write(node)
+        export_cache.node_written(node["name"], start, file.tell())
+    file.write("]")
+    if binary_buffer is not None:
+        binary_buffer.close()
+        file.write(',"buffer":')
+        writer.write({"uri": binary_buffer.uri, "byte_length": binary_buffer.byte_length})
+    file.write("}")
+export_cache.close()
+if binary_buffer is not None:
+    binary_buffer.replace()
+os.replace(output_path + ".tmp", output_path)
+export_cache.save(output_path, binary_buffer)
+print("Export of " + output_path + " complete")
@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Exports every .blend under a folder with blend-to-json.py, several background Blender processes at a time, eg.
+#   python export-blends.py --jobs 4 -- --binary
+# Anything after "--" is handed on to blend-to-json.py.
+
+CONTENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXPORT_SCRIPT = os.path.join(CONTENT_DIR, "blend-to-json.py")
+# Script arguments each .blend was last exported with, relative path -> list of arguments
+EXPORT_ARGS_FILE = ".export-blends.json"
+
+def parse_arguments():
+    argv = sys.argv[1:]
+    script_args = []
+    if "--" in argv:
+        script_args = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+    parser = argparse.ArgumentParser(description="Export every .blend file to <file>.blend.json in parallel Blender processes")
+    parser.add_argument("--content-dir", default=CONTENT_DIR,
+                        help="Folder searched recursively for .blend files")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"),
+                        help="Blender executable, defaults to $BLENDER or blender on the path")
+    parser.add_argument("--jobs", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Number of Blender processes to run at once")
+    parser.add_argument("--force", action="store_true",
+                        help="Export even when the outputs are up to date with the .blend, the export script and its arguments")
+    options = parser.parse_args(argv)
+    options.script_args = script_args
+    return options
+
+def find_blend_files(content_dir):
+    blend_paths = []
+    for root, _, files in os.walk(content_dir):
+        for file in files:
+            if file.endswith(".blend"):
+                blend_paths.append(os.path.join(root, file))
+    return sorted(blend_paths)
+
+def output_paths(blend_path, script_args):
+    outputs = [blend_path + ".json"]
+    if "--binary" in script_args:
+        outputs.append(blend_path + ".bin")
+    return outputs
+
+def load_export_args(content_dir):
+    try:
+        with open(os.path.join(content_dir, EXPORT_ARGS_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_export_args(content_dir, export_args):
+    path = os.path.join(content_dir, EXPORT_ARGS_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(export_args, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def is_up_to_date(blend_path, script_args, exported_args):
+    """Last exported with the same script arguments, and the outputs are newer than both the .blend and the export script"""
+    if exported_args != list(script_args):
+        return False
+    newest_input = max(os.path.getmtime(blend_path), os.path.getmtime(EXPORT_SCRIPT))
+    for output_path in output_paths(blend_path, script_args):
+        if not os.path.exists(output_path) or os.path.getmtime(output_path) < newest_input:
+            return False
+    return True
+
+def export_blend(blender, blend_path, script_args):
+    """Runs one background export, returning (seconds taken, completed process)"""
+    # Without --python-exit-code Blender exits 0 even when the script raises
+    cmd = [blender, "-b", blend_path, "--python-exit-code", "1", "--python", EXPORT_SCRIPT, "--", *script_args]
+    start = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    return time.perf_counter() - start, result
+
+def main():
+    options = parse_arguments()
+    blend_paths = find_blend_files(options.content_dir)
+    export_args = load_export_args(options.content_dir)
+    if not options.force:
+        skipped = [path for path in blend_paths
+                   if is_up_to_date(path, options.script_args, export_args.get(os.path.relpath(path, options.content_dir)))]
+        for path in skipped:
+            print(f"Up to date: {os.path.relpath(path, options.content_dir)}")
+        blend_paths = [path for path in blend_paths if path not in skipped]
+    if not blend_paths:
+        print("Nothing to export")
+        return 0
+
+    print(f"Exporting {len(blend_paths)} .blend files with {options.jobs} Blender processes")
+    failures = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=options.jobs) as executor:
+        futures = {executor.submit(export_blend, options.blender, path, options.script_args): path for path in blend_paths}
+        for future in as_completed(futures):
+            name = os.path.relpath(futures[future], options.content_dir)
+            try:
+                seconds, result = future.result()
+            except OSError as e:
+                print(f"  FAILED {name}: {e}")
+                failures.append(name)
+                continue
+            if result.returncode != 0:
+                print(f"  FAILED {name} after {seconds:.2f}s (exit code {result.returncode})")
+                print(result.stdout)
+                print(result.stderr, file=sys.stderr)
+                failures.append(name)
+                if export_args.pop(name, None) is not None:
+                    save_export_args(options.content_dir, export_args)
+            else:
+                print(f"  {name}: {seconds:.2f}s")
+                export_args[name] = list(options.script_args)
+                save_export_args(options.content_dir, export_args)
+    print(f"Exported {len(blend_paths) - len(failures)}/{len(blend_paths)} in {time.perf_counter() - start:.2f}s")
+    if failures:
+        print("Failed: " + ", ".join(failures), file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -40,7 +40,12 @@ const hexColors = [_][3]f32{
 
 pub fn loadModelsFromBlends(
     arena: std.mem.Allocator,
-    comptime blend_inputs: []const struct { model_name: []const u8, subdiv_level: u8 = 0 },
+    comptime blend_inputs: []const struct {
+        model_name: []const u8,
+        subdiv_level: u8 = 0,
+        /// Exported with `blend-to-json.py -- --binary`, mesh data lives in a `.blend.bin` sidecar.
+        binary: bool = false,
+    },
 ) !struct {
     models: std.ArrayList(types.GameModel),
     model_transforms: std.StringHashMap(zmath.Mat),
@@ -50,13 +55,22 @@ pub fn loadModelsFromBlends(
     var armatures = std.StringHashMap(BlendMeshSpec.Armature).init(arena);
     inline for (blend_inputs) |blend_input| {
         const json_data = @embedFile(std.fmt.comptimePrint("./content/{s}.blend.json", .{blend_input.model_name}));
+        const sidecar: ?[]align(16) const u8 = if (blend_input.binary) &struct {
+            const bytes align(16) = @embedFile(std.fmt.comptimePrint("./content/{s}.blend.bin", .{blend_input.model_name})).*;
+        }.bytes else null;
         const blend = try loadBlendFromJson(arena, json_data);
+        if (blend.buffer) |buffer| {
+            if (sidecar == null or sidecar.?.len != buffer.byte_length) {
+                return error.SidecarBufferMismatch;
+            }
+        }
         for (blend.nodes) |node| {
             if (node.armature) |armature| {
                 try armatures.put(node.name, armature);
             }
-            if (node.mesh) |mesh| {
-                const positions = mesh_helper.decodeVertexDataFromHexidecimal(arena, mesh.vertices);
+            if (node.mesh) |encoded_mesh| {
+                const mesh = try decodeMesh(arena, encoded_mesh, sidecar);
+                const positions = mesh.positions;
                 const label = try std.mem.concat(arena, u8, &.{ blend_input.model_name, "_", node.name });
                 if (blend_input.subdiv_level > 0) {
                     const faces = mesh.polygons;
@@ -74,6 +88,7 @@ pub fn loadModelsFromBlends(
                             .top_indices = mesh_helper.Polygon(.Quad).toTriangleIndices(arena, subdiv_result.quads),
                             .base_positions = positions,
                             .base_bone_indices = mesh.bone_indices,
+                            .base_skin = mesh.skin,
                             .base_faces = mesh.polygons,
                             .quads_per_subdiv = quads_per_subdiv.items,
                         } }}),
@@ -84,9 +99,9 @@ pub fn loadModelsFromBlends(
                         .label = label,
                         .meshes = try arena.dupe(types.GameMesh, &.{.{ .greybox = .{
                             .color = .{ 0.6, 0.6, 0.6, 0.6 },
-                            .indices = mesh_helper.Polygon(.Face).toTriangleIndices(arena, mesh.polygons),
+                            .indices = mesh.triangles orelse mesh_helper.Polygon(.Face).toTriangleIndices(arena, mesh.polygons),
 
-                            .normal = mesh_helper.Polygon(.Face).calculateNormals(arena, positions, mesh.polygons),
+                            .normal = mesh.normals orelse mesh_helper.Polygon(.Face).calculateNormals(arena, positions, mesh.polygons),
                             .position = positions,
                         } }}),
                     };
@@ -109,6 +124,112 @@ pub fn loadModelsFromBlends(
     };
 }
 
+const DecodedMesh = struct {
+    positions: []const mesh_helper.Point,
+    polygons: []const mesh_helper.Face,
+    bone_indices: []const i8,
+    /// Present when triangulated at export time.
+    triangles: ?[]const u32 = null,
+    normals: ?[]const mesh_helper.Point = null,
+    skin: ?[]const types.SkinInfluence = null,
+};
+
+/// Meshes either carry hexidecimal vertices and inline polygons, or views into the binary sidecar.
+/// Sidecar views are used in place, only the polygon slices need to be built.
+fn decodeMesh(arena: std.mem.Allocator, mesh: anytype, sidecar: ?[]align(16) const u8) !DecodedMesh {
+    const views = mesh.views orelse return .{
+        .positions = mesh_helper.decodeVertexDataFromHexidecimal(arena, mesh.vertices),
+        .polygons = mesh.polygons,
+        .bone_indices = mesh.bone_indices,
+        .triangles = mesh.triangles,
+        .normals = if (mesh.normals) |normals| normals: {
+            const decoded = try arena.dupe(mesh_helper.Point, mesh_helper.decodeVertexDataFromHexidecimal(arena, normals));
+            for (decoded) |*normal| normal.*[3] = 0;
+            break :normals decoded;
+        } else null,
+        .skin = if (mesh.skin_indices) |skin_indices| try packSkin(u16, arena, skin_indices, mesh.skin_weights.?) else null,
+    };
+    const buffer = sidecar orelse return error.MissingSidecarBuffer;
+    const polygon_sizes = bufferViewSlice(u32, buffer, views.polygon_sizes);
+    const polygon_indices = bufferViewSlice(u32, buffer, views.polygon_indices);
+    const polygons = try arena.alloc(mesh_helper.Face, polygon_sizes.len);
+    var start: usize = 0;
+    for (polygons, polygon_sizes) |*polygon, size| {
+        polygon.* = polygon_indices[start..][0..size];
+        start += size;
+    }
+    return .{
+        .positions = if (mesh.quantization) |quantization|
+            try dequantizePositions(arena, bufferViewSlice(u16, buffer, views.vertices), quantization)
+        else
+            bufferViewSlice(mesh_helper.Point, buffer, views.vertices),
+        .polygons = polygons,
+        .bone_indices = try decodeBoneIndices(arena, buffer, views.bone_indices),
+        .triangles = if (views.triangle_indices) |view| bufferViewSlice(u32, buffer, view) else null,
+        .normals = if (views.normals) |view| bufferViewSlice(mesh_helper.Point, buffer, view) else null,
+        .skin = if (views.skin_indices) |view| skin: {
+            const skin_weights = bufferViewSlice(f32, buffer, views.skin_weights.?);
+            if (std.mem.eql(u8, view.component_type, "u8")) {
+                break :skin try packSkin(u8, arena, bufferViewSlice(u8, buffer, view), skin_weights);
+            }
+            break :skin try packSkin(u16, arena, bufferViewSlice(u16, buffer, view), skin_weights);
+        } else null,
+    };
+}
+
+fn dequantizePositions(arena: std.mem.Allocator, quantized: []const u16, quantization: anytype) ![]const mesh_helper.Point {
+    const min: mesh_helper.Point = .{ quantization.min[0], quantization.min[1], quantization.min[2], 1 };
+    const scale: mesh_helper.Point = .{ quantization.scale[0], quantization.scale[1], quantization.scale[2], 0 };
+    const positions = try arena.alloc(mesh_helper.Point, quantized.len / 3);
+    for (positions, 0..) |*position, i| {
+        const steps: mesh_helper.Point = .{
+            @floatFromInt(quantized[i * 3 + 0]),
+            @floatFromInt(quantized[i * 3 + 1]),
+            @floatFromInt(quantized[i * 3 + 2]),
+            0,
+        };
+        position.* = min + steps * scale;
+    }
+    return positions;
+}
+
+/// Quantized exports narrow bone indices to u8/u16, with the type's max value standing in for -1.
+fn decodeBoneIndices(arena: std.mem.Allocator, buffer: []align(16) const u8, view: BlendMeshSpec.BufferView) ![]const i8 {
+    if (std.mem.eql(u8, view.component_type, "i8")) {
+        return bufferViewSlice(i8, buffer, view);
+    }
+    if (std.mem.eql(u8, view.component_type, "u8")) {
+        return narrowBoneIndices(u8, arena, bufferViewSlice(u8, buffer, view));
+    }
+    if (std.mem.eql(u8, view.component_type, "u16")) {
+        return narrowBoneIndices(u16, arena, bufferViewSlice(u16, buffer, view));
+    }
+    return error.UnsupportedBoneIndexType;
+}
+
+fn narrowBoneIndices(comptime T: type, arena: std.mem.Allocator, indices: []const T) ![]const i8 {
+    const bone_indices = try arena.alloc(i8, indices.len);
+    for (bone_indices, indices) |*bone_index, index| {
+        bone_index.* = if (index == std.math.maxInt(T)) -1 else std.math.cast(i8, index) orelse return error.TooManyBones;
+    }
+    return bone_indices;
+}
+
+fn packSkin(comptime T: type, arena: std.mem.Allocator, skin_indices: []const T, skin_weights: []const f32) ![]const types.SkinInfluence {
+    const skin = try arena.alloc(types.SkinInfluence, skin_indices.len / 4);
+    for (skin, 0..) |*influence, i| {
+        for (0..4) |slot| {
+            influence.bone_indices[slot] = skin_indices[i * 4 + slot];
+            influence.weights[slot] = skin_weights[i * 4 + slot];
+        }
+    }
+    return skin;
+}
+
+fn bufferViewSlice(comptime T: type, buffer: []align(16) const u8, view: BlendMeshSpec.BufferView) []const T {
+    return @alignCast(std.mem.bytesAsSlice(T, buffer[view.byte_offset..][0..view.byte_length]));
+}
+
 pub fn loadBlendFromJson(allocator: std.mem.Allocator, json_data: []const u8) !BlendMeshSpec {
     var scanner = std.json.Scanner.initCompleteInput(allocator, json_data);
     defer scanner.deinit();
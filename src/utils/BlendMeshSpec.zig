@@ -13,6 +13,7 @@ pub const Armature = struct {
             scale: Vec4,
         },
     },
+    /// Every bone sampled on every frame, empty when the export was compressed into `tracks`.
     animation: []const struct {
         frame: u32,
         bones: []const struct {
@@ -20,10 +21,136 @@ pub const Armature = struct {
             rotation: Vec4,
             scale: Vec4,
         },
-    },
+    } = &.{},
+    /// Exported with `blend-to-json.py -- --compress-animation`, one entry per bone.
+    frame_count: u32 = 0,
+    tracks: []const BoneTracks = &.{},
+
+    pub const Pose = struct {
+        position: Vec4,
+        rotation: Vec4,
+        scale: Vec4,
+    };
+
+    /// Pose of a bone at a fractional frame, looping back to the first frame after the last.
+    pub fn sampleBone(self: Armature, bone_index: usize, frame: f32) Pose {
+        if (self.tracks.len > 0) {
+            const bone_tracks = self.tracks[bone_index];
+            const time = @mod(frame, @as(f32, @floatFromInt(self.frame_count)));
+            return .{
+                .position = bone_tracks.position.sample(time, self.frame_count, .linear),
+                .rotation = bone_tracks.rotation.sample(time, self.frame_count, .spherical),
+                .scale = bone_tracks.scale.sample(time, self.frame_count, .linear),
+            };
+        }
+        const whole_frame: usize = @intFromFloat(frame);
+        const lerp = frame - @as(f32, @floatFromInt(whole_frame));
+        const current = self.animation[whole_frame % self.animation.len].bones[bone_index];
+        const next = self.animation[(whole_frame + 1) % self.animation.len].bones[bone_index];
+        return .{
+            .position = zmath.lerp(current.position, next.position, lerp),
+            .rotation = zmath.slerp(current.rotation, next.rotation, lerp),
+            .scale = zmath.lerp(current.scale, next.scale, lerp),
+        };
+    }
+};
+
+pub const BoneTracks = struct {
+    position: Track,
+    rotation: Track,
+    scale: Track,
+};
+
+/// Keys left after dropping the samples interpolation reproduces, always starting at frame 0.
+pub const Track = struct {
+    /// Frame offsets from the first exported frame, ascending.
+    times: []const f32,
+    values: []const Vec4,
+
+    fn sample(self: Track, time: f32, frame_count: u32, interpolation: enum { linear, spherical }) Vec4 {
+        // Binary search for the last key at or before `time`
+        var key: usize = 0;
+        var end = self.times.len;
+        while (key + 1 < end) {
+            const mid = (key + end) / 2;
+            if (self.times[mid] <= time) key = mid else end = mid;
+        }
+        const next_key = (key + 1) % self.times.len;
+        const next_time = if (next_key == 0) @as(f32, @floatFromInt(frame_count)) else self.times[next_key];
+        const span = next_time - self.times[key];
+        const t = if (span > 0) (time - self.times[key]) / span else 0;
+        return switch (interpolation) {
+            .linear => zmath.lerp(self.values[key], self.values[next_key], t),
+            .spherical => zmath.slerp(self.values[key], self.values[next_key], t),
+        };
+    }
+};
+
+/// Byte range of a little-endian typed array inside the `.blend.bin` sidecar.
+pub const BufferView = struct {
+    component_type: []const u8,
+    count: usize,
+    byte_offset: usize,
+    byte_length: usize,
+};
+
+pub const Mesh = struct {
+    polygons: []const mesh_helper.Face = &.{},
+    vertices: []const u8 = "", // hexidecimal-encoding of Point type
+    bone_indices: []const i8 = &.{},
+    /// Exported with `blend-to-json.py -- --optimize-triangles`, in vertex cache friendly order.
+    triangles: ?[]const u32 = null,
+    normals: ?[]const u8 = null, // hexidecimal-encoding of (x, y, z) per vertex
+    acmr: ?struct {
+        before: f32,
+        after: f32,
+    } = null,
+    /// Exported with `blend-to-json.py -- --skin-weights`, 4 bones and normalized weights per vertex.
+    skin_indices: ?[]const u16 = null,
+    skin_weights: ?[]const f32 = null,
+    /// Exported with `blend-to-json.py -- --binary --quantize`, vertices are u16 steps of `scale` up from `min`.
+    quantization: ?struct {
+        min: [3]f32,
+        scale: [3]f32,
+        max_error: f32,
+    } = null,
+    views: ?struct {
+        polygon_sizes: BufferView,
+        polygon_indices: BufferView,
+        vertices: BufferView, // (x, y, z, 1) f32 per vertex, layout of Point type - or (x, y, z) u16 when quantized
+        bone_indices: BufferView, // i8, or u8/u16 with the type's max value meaning no bone when quantized
+        triangle_indices: ?BufferView = null,
+        normals: ?BufferView = null, // (x, y, z, 0) f32 per vertex
+        skin_indices: ?BufferView = null, // 4 u8 or u16 per vertex
+        skin_weights: ?BufferView = null, // 4 f32 per vertex
+    } = null,
+    /// Exported with `blend-to-json.py -- --lod-triangles ...`, finest first.
+    lods: []const Lod = &.{},
+
+    /// Coarsest level whose error covers at most `max_pixel_error` pixels, null to draw the full mesh.
+    /// `pixels_per_unit` is pixels per world unit at a distance of 1, screen height / (2 * tan(fov_y / 2)).
+    pub fn selectLod(self: Mesh, distance: f32, pixels_per_unit: f32, max_pixel_error: f32) ?usize {
+        var selected: ?usize = null;
+        for (self.lods, 0..) |lod, lod_index| {
+            if (lod.geometric_error / distance * pixels_per_unit > max_pixel_error) break;
+            selected = lod_index;
+        }
+        return selected;
+    }
+};
+
+pub const Lod = struct {
+    triangle_count: u32,
+    /// Furthest a full-detail vertex sits from this level's surface.
+    geometric_error: f32,
+    mesh: Mesh,
 };
 
 framerate: u32,
+buffer: ?struct {
+    uri: []const u8,
+    byte_length: usize,
+} = null,
 nodes: []const struct {
     name: []const u8,
     type: []const u8,
@@ -31,10 +158,6 @@ nodes: []const struct {
     position: Vec4,
     rotation: Vec4,
     scale: Vec4,
-    mesh: ?struct {
-        polygons: []const mesh_helper.Face,
-        vertices: []const u8, // hexidecimal-encoding of Point type
-        bone_indices: []const i8,
-    } = null,
+    mesh: ?Mesh = null,
     armature: ?Armature = null,
 },
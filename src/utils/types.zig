@@ -25,10 +25,18 @@ pub const GreyboxMesh = struct {
     normal: []const Vec4,
 };
 
+/// Bones deforming one vertex, unused slots have a weight of 0.
+pub const SkinInfluence = struct {
+    bone_indices: [4]u16,
+    weights: [4]f32,
+};
+
 pub const SubdivBoneMesh = struct {
     top_indices: []const u32,
     base_positions: []const Vec4,
     base_bone_indices: []const i8,
+    /// Blended skinning, replaces `base_bone_indices` when present.
+    base_skin: ?[]const SkinInfluence = null,
     base_faces: []const Face,
     quads_per_subdiv: []const []const Quad,
     armature: Armature,